@@ -0,0 +1,62 @@
+import sympy as sp
+import hashlib
+import os
+import pickle
+
+# Format tag of the cache keys. Pickled sympy objects are not portable between sympy versions,
+# so entries of another format or sympy version are never looked up.
+LD_cache_format = "LDCache-v1:pickle:sympy-" + sp.__version__
+
+class LDCache():
+    # Content-addressed cache of Lie derivatives and their gradients.
+    # A Lie derivative L_{f_i ... f_j} h only depends on x, h and the vector fields f_i ... f_j,
+    # so the cache key is a hash of these expressions and the vector field sequence.
+    # The same cache can be shared by several NOA objects and optionally stored on disk.
+    def __init__(self, cache_dir=""):
+        self.cache_dir = cache_dir              # directory of the on-disk cache, "" for in-memory only
+        self.memo = {}                          # in-memory cache {key: (Lfh, dLfh_dx)}
+        self.hits = int(0)                      # number of cache hits
+        self.misses = int(0)                    # number of cache misses
+        if self.cache_dir != "" and not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+    def digest(self, expr):
+        # Stable hash of a sympy expression
+        return hashlib.sha256(sp.srepr(expr).encode()).hexdigest()
+
+    def key(self, x_h_digest, f_digests_seq):
+        # Cache key of a Lie derivative from the format tag, the digest of (x, h) and the digests of its vector field sequence
+        return hashlib.sha256((LD_cache_format + ":" + x_h_digest + ":" + ",".join(f_digests_seq)).encode()).hexdigest()
+
+    def get(self, key):
+        # Returns (Lfh, dLfh_dx) or None if the Lie derivative is not cached
+        if key in self.memo:
+            self.hits += 1
+            return self.memo[key]
+        if self.cache_dir != "":
+            cache_file_name = os.path.join(self.cache_dir, key + ".pkl")
+            if os.path.exists(cache_file_name):
+                try:
+                    with open(cache_file_name, 'rb') as file:
+                        self.memo[key] = pickle.load(file)
+                    self.hits += 1
+                    return self.memo[key]
+                except (pickle.UnpicklingError, EOFError, AttributeError):
+                    os.remove(cache_file_name)  # corrupted or incompatible entry, recomputed as a miss
+        self.misses += 1
+        return None
+
+    def put(self, key, Lfh, dLfh_dx):
+        self.memo[key] = (Lfh, dLfh_dx)
+        if self.cache_dir != "":
+            # written to a temporary file first, so an interrupted write does not leave a truncated entry
+            cache_file_name = os.path.join(self.cache_dir, key + ".pkl")
+            with open(cache_file_name + ".tmp", 'wb') as file:
+                pickle.dump(self.memo[key], file)
+            os.replace(cache_file_name + ".tmp", cache_file_name)
+
+    def clear(self):
+        # Clear the in-memory cache. The on-disk cache is left untouched
+        self.memo = {}
+        self.hits = int(0)
+        self.misses = int(0)
@@ -1,17 +1,36 @@
 import sympy as sp
-from sympy.solvers import pdsolve, checkpdesol
+import numpy as np
 import random
 import json
-from itertools import permutations, combinations, product
-from IPython.display import display
+from itertools import permutations, combinations, product, islice
+from math import comb
+from concurrent.futures import ProcessPoolExecutor
+import logging
 
 from datetime import datetime
 import os
-import pickle, dill
+import time
+import hashlib
+
+from .LDCache import LDCache
+from .ObsvModes import ObsvModes
+from .obsv_mat_numeric import obsv_mat_lambdify, obsv_mat_sample_points, svd_rank, sv_gap, obsv_mat_map, svd_nullspace, null_state_classify, rank_probe_update, rank_probe
+from .obsv_mat_domain import domain_rank, domain_nullspace
+from .lie_derivative import lie_derivative, lie_derivative_worker_init, lie_derivative_worker, is_zero_mat, sparse_jacobian
+from .symengine_backend import lie_derivative_symengine, to_symengine, to_sympy
+from .expr_serialize import expr_dumps, expr_loads
+from .expr_manage import expr_simp_policies
+from .struct_screen import struct_screen
+from .checkpoint import checkpoint_write, checkpoint_read
+
+logger = logging.getLogger(__name__)
 
 class NOA():
-    def __init__(self, name):
+    def __init__(self, name, verbose=1):
         self.name = name                        # object name
+        self.verbose = verbose                  # 0 quiet (headless), 1 summary or 2 every Lie derivative printed output
+        self.callbacks = []                     # functions callback(event, metrics) called on "LD", "order", "stage" & "rank" events
+        self.order_metrics = []                 # time, rows, rank & expression size of each Lie derivative order
         self.x = sp.Matrix()                    # state vector
         self.f = []                             # vector fields
         self.h = sp.Matrix()                    # measurement model
@@ -22,41 +41,230 @@ class NOA():
         self.params_config_subs = sp.Matrix()   # parameters that will be substituted with json numerical values
         self.new_params_dict = {}
 
-        self.combn_permn_opt = "permutation"    # combination or permutation of vector fields Lie derivatives
+        self.combn_permn_opt = "permutation"    # combination, permutation or pruned expansion of vector fields Lie derivatives
+        self.struct_screen_opt = True           # structural (sparsity pattern) observability screen before the Lie derivatives
+        self.struct_rank = int(-1)              # structural rank, an upper bound of rank_obsv_mat, -1 if not screened
+        self.struct_LD_order = int(0)           # minimal Lie derivative order that reaches struct_rank
+        self.struct_unobsv = []                 # states that are certainly unobservable from the structural screen
         self.LD_order = int(0)                  # maximum Lie derivative order
         self.Lfh = {}                           # Lie derivatives
         self.dLfh_dx = {}                       # gradient of Lie derivatives wrt x
+        self.LD_cache = LDCache()               # Lie derivatives cache, None to disable
+        self.LD_cache_x_h_digest = ""           # digest of state vector & measurement model for LD_cache keys
+        self.LD_cache_f_digests = []            # digest of each vector field for LD_cache keys
+        self.num_workers = int(1)               # number of parallel processes of Lie derivatives construction per order
+        self.LD_executor = None                 # process pool of the parallel Lie derivatives, shared by all batches of an ORC() call
+        self.LD_batch_size = int(256)           # number of vector field sequences taken from the stream per batch
+        self.LD_free_opt = False                # free Lie derivatives that are no longer needed for the next order
+        self.f_zero = []                        # True for each vector field that is identically zero
+        self.LD_simp_opt = "none"               # none, expand, cancel or trigsimp expression management of Lie derivatives
+        self.LD_size_budget = int(0)            # count_ops above which LD_simp_opt is applied, 0 to always apply it
+        self.LD_count_ops = {}                  # expression size of each order {k: {"Lfh": count_ops, "dLfh_dx": count_ops}}
+        self.backend_opt = "sympy"              # sympy or symengine computation of Lie derivatives & their gradients
+        self.x_se = None                        # SymEngine state vector of backend_opt = "symengine"
+        self.f_se = []                          # SymEngine vector fields of backend_opt = "symengine"
+        self.dLfh_dx_se = {}                    # SymEngine gradients of the last order, the inputs of the next order
         
-        self.rank_calc_opt = "symbolic"         # symbolic or numeric rank calculation of observability matrix
+        self.rank_calc_opt = "symbolic"         # symbolic, numeric or svd rank calculation of observability matrix
         self.numeric_params_dict = {}           # numeric parameters dictionary
         self.obsv_mat = sp.Matrix()             # observability matrix
+        self.obsv_mat_keys = []                 # Lie derivatives whose gradients are the row blocks of obsv_mat, in order
         self.obsv_mat_num = sp.Matrix()         # numeric observability matrix substituted with json numerical values
         self.rank_obsv_mat = int(0)             # rank of observability matrix
+        self.linalg_opt = "sympy"               # sympy or domain (fraction-free DomainMatrix) symbolic rank & nullspace calculation
+
+        self.svd_num_samples = int(8)           # number of random sample points of svd rank calculation
+        self.svd_tol = 1e-9                     # relative tolerance of zero singular values
+        self.svd_sample_range = (0.5, 2.0)      # uniform sampling range of states & parameters
+        self.svd_seed = None                    # random seed of the sample points
+        self.obsv_mat_symbols = []              # ordered free symbols of the compiled observability matrix
+        self.obsv_mat_func = None               # compiled numpy function of the observability matrix
+        self.singular_values = np.array([])     # singular values of the observability matrix at each sample point
+        self.sv_gap = 0.0                       # singular value gap sigma_rank / sigma_(rank+1), or sigma_rank / (svd_tol * sigma_1) at full rank
+        self.obsv_map_batch_size = int(65536)   # number of points per batch of the observability map
+
+        self.rank_track_opt = "final"           # final or incremental rank tracking of observability matrix
+        self.obsv_basis = []                    # orthonormal basis of the observability matrix rows at each probe point
+        self.rank_probe_symbols = []            # ordered free symbols of x, f & h evaluated at the probe points
+        self.rank_probe_points = np.array([])   # probe points of the incremental rank tracking (svd_num_samples x len(rank_probe_symbols))
+        self.LD_needed = []                     # Lie derivatives that increased the rank of observability matrix
+        self.full_rank_reached = False          # True when incremental rank reaches sys_order or struct_rank, the maximal attainable rank
 
         self.null_calc_opt = "symbolic"         # symbolic or numeric nullspace calculation of observability matrix
         self.cont_symm = []                     # continuous symmetries (nullspace of observability matrix)
         self.cont_symm_mat = sp.Matrix()        # matrix comprised of continuous symmetries
         self.nonobsv_subspace = sp.Matrix()     # joint observable & unobservable subspace
         self.obsv_subspace = sp.Matrix()        # observable subspace
+        self.null_tol = 1e-6                    # tolerance of the zero & unit row norms of the numeric nullspace basis
+        self.null_verify_opt = False            # symbolic verification of the numeric state classification
+        self.obsv_modes = ObsvModes()           # observable, jointly observable & unobservable states
+
+        self.stage_times = {}                   # accumulated computation time of each stage in seconds {stage: time}
 
-        self.backup_name = ""                   # backup pickle & dill file name
-        print(name, "NOA object initialized")
+        self.backup_name = ""                   # backup checkpoint file name
+        self.checkpoint_dir = ""                # directory of the checkpoint of each Lie derivative order, "" to disable
+        self.checkpoint_digest = ""             # digest of the model & ORC options in the checkpoint file names
+        self.log(name, "NOA object initialized")
 
     def permn_rep(self, input_list, r_length_permn):
         # Permutation with repetition method
         # input_list     : list of elements to be permutated
         # r_length_permn : r length permutations of elements
-        results = []
-        for prod in product(input_list, repeat = r_length_permn):
-            results.append(prod)
-        return results
+        # Permutations are generated lazily, one at a time
+        yield from product(input_list, repeat = r_length_permn)
     
+    def log(self, *args, level=1):
+        # Printed output of verbose level >= level, also sent to the logging module at INFO (level 1) or DEBUG (level 2).
+        # The message is only formatted if it is printed or logged.
+        log_level = logging.INFO if level <= 1 else logging.DEBUG
+        if self.verbose >= level:
+            print(*args)
+        if logger.isEnabledFor(log_level):
+            logger.log(log_level, " ".join(str(arg) for arg in args))
+
+    def display_expr(self, expr):
+        # IPython display of an expression, skipped in quiet mode. IPython is only imported when something is displayed
+        if self.verbose >= 1:
+            from IPython.display import display
+            display(expr)
+
+    def emit(self, event, **metrics):
+        # Send the metrics of an event to the callbacks
+        for callback in self.callbacks:
+            callback(event, metrics)
+
+    def stage_time_add(self, stage, time_start):
+        # Accumulate the computation time of a stage since time_start = time.perf_counter()
+        stage_time = time.perf_counter() - time_start
+        self.stage_times[stage] = self.stage_times.get(stage, 0.0) + stage_time
+        self.emit("stage", stage=stage, time=stage_time)
+
+    def LD_str_to_idx(self, vector_field_str):
+        # Vector field indices of a Lie derivative name, e.g. "k2f0f1" -> (0, 1)
+        return tuple(int(idx_vector_field) for idx_vector_field in vector_field_str.split("f")[1:])
+
     def update_params_dict(self, new_params_dict):
         self.new_params_dict = new_params_dict
 
-    def obsv_mat_construct(self, idx_all_perm, k):
+    def is_zero_expr(self, expr):
+        # Zero test of a (possibly symbolic) expression.
+        # Closed-form numbers are screened with a high precision evaluation before simplifying
+        if expr == 0:
+            return True
+        if not expr.free_symbols and abs(expr.evalf(30)) > 1e-20:
+            return False
+        return sp.simplify(expr) == 0
+
+    def rank_probe_init(self):
+        # Probe points of the incremental rank tracking. The rows of the observability matrix are evaluated in floating point
+        # at these points instead of being eliminated symbolically, which keeps the cost of each row independent of its expression size.
+        # numeric: the parameters keep their numeric_params_dict values, svd: their svd_params_construct() values,
+        # symbolic: all symbols are sampled, so the tracked rank is the generic rank with probability 1.
+        if self.rank_calc_opt == "numeric" or self.rank_calc_opt == "numerical":
+            fixed_params_dict = self.numeric_params_dict
+        elif self.rank_calc_opt == "svd":
+            fixed_params_dict = self.svd_params_construct()
+        else:
+            fixed_params_dict = {}
+        self.rank_probe_symbols = sorted(set().union(self.x.free_symbols, self.h.free_symbols, *[f_i.free_symbols for f_i in self.f]), key=str)
+        num_probe_points = 1 if all(symbol in fixed_params_dict for symbol in self.rank_probe_symbols) else self.svd_num_samples
+        rng = np.random.default_rng(self.svd_seed)
+        self.rank_probe_points = obsv_mat_sample_points(self.rank_probe_symbols, num_probe_points, fixed_params_dict, self.svd_sample_range, rng)
+        self.obsv_basis = [np.zeros((0, self.sys_order)) for _ in range(num_probe_points)]
+
+    def LD_cache_key(self, idx_perm_k):
+        # LD_cache key of the Lie derivative along the vector field sequence idx_perm_k
+        return self.LD_cache.key(self.LD_cache_x_h_digest, [self.LD_cache_f_digests[i] for i in idx_perm_k])
+
+    def LD_is_zero(self, idx_perm_k, previous_order_vector_field_str):
+        # A Lie derivative along a zero vector field or of a zero gradient is zero, without computing it.
+        # Zero Lie derivatives are not stored, so a missing previous order gradient is zero.
+        return self.f_zero[idx_perm_k[-1]] or previous_order_vector_field_str not in self.dLfh_dx \
+            or is_zero_mat(self.dLfh_dx[previous_order_vector_field_str])
+
+    def lie_derivative_se(self, idx_perm_k, current_order_vector_field_str, previous_order_vector_field_str):
+        # Lie derivative & its gradient wrt x from the SymEngine gradient of the previous order.
+        # The gradient stays in SymEngine as the input of the next order, only Lfh & dLfh_dx are converted to sympy.
+        if previous_order_vector_field_str not in self.dLfh_dx_se:
+            # gradients of order 0, from LD_cache or from a checkpoint are only available in sympy
+            self.dLfh_dx_se[previous_order_vector_field_str] = to_symengine(self.dLfh_dx[previous_order_vector_field_str])
+        Lfh_se, dLfh_dx_se = lie_derivative_symengine(self.dLfh_dx_se[previous_order_vector_field_str], self.f_se[idx_perm_k[-1]], self.x_se,
+                                                      self.LD_simp_opt, self.LD_size_budget)
+        self.dLfh_dx_se[current_order_vector_field_str] = dLfh_dx_se
+        return to_sympy(Lfh_se), to_sympy(dLfh_dx_se)
+
+    def lie_derivative_cached(self, idx_perm_k, current_order_vector_field_str, previous_order_vector_field_str):
+        # Lie derivative & its gradient wrt x, taken from LD_cache when available
+        LD_cached = None
+        if self.LD_cache != None:
+            LD_cache_key = self.LD_cache_key(idx_perm_k)
+            LD_cached = self.LD_cache.get(LD_cache_key)
+        if LD_cached != None:
+            return LD_cached
+        if self.backend_opt == "symengine":
+            Lfh, dLfh_dx = self.lie_derivative_se(idx_perm_k, current_order_vector_field_str, previous_order_vector_field_str)
+        else:
+            Lfh, dLfh_dx = lie_derivative(self.dLfh_dx[previous_order_vector_field_str], self.f[idx_perm_k[-1]], self.x,
+                                          self.LD_simp_opt, self.LD_size_budget)
+        if self.LD_cache != None:
+            self.LD_cache.put(LD_cache_key, Lfh, dLfh_dx)
+        return Lfh, dLfh_dx
+
+    def lie_derivative_parallel(self, LD_list):
+        # Lie derivatives of one order computed in a process pool of num_workers processes.
+        # Lie derivatives of the same order only depend on the previous order gradients, so they are independent of each other.
+        # Returns {current_order_vector_field_str: (Lfh, dLfh_dx)}
+        LD_parallel = {}
+        LD_tasks = []
+        for idx_perm_k, current_order_vector_field_str, previous_order_vector_field_str in LD_list:
+            if self.LD_is_zero(idx_perm_k, previous_order_vector_field_str):
+                continue
+            LD_cached = None
+            if self.LD_cache != None:
+                LD_cached = self.LD_cache.get(self.LD_cache_key(idx_perm_k))
+            if LD_cached != None:
+                LD_parallel[current_order_vector_field_str] = LD_cached
+            else:
+                LD_tasks.append((idx_perm_k, current_order_vector_field_str, previous_order_vector_field_str))
+        if len(LD_tasks) == 0:
+            return LD_parallel
+
+        self.log("Computing", len(LD_tasks), "Lie derivatives in", self.num_workers, "parallel processes ...", level=2)
+        dLfh_dx_prev_serialized = {}
+        for _, _, previous_order_vector_field_str in LD_tasks:
+            if previous_order_vector_field_str not in dLfh_dx_prev_serialized:
+                dLfh_dx_prev_serialized[previous_order_vector_field_str] = expr_dumps(self.dLfh_dx[previous_order_vector_field_str])
+        worker_args = [(dLfh_dx_prev_serialized[previous_order_vector_field_str], idx_perm_k[-1])
+                       for idx_perm_k, _, previous_order_vector_field_str in LD_tasks]
+        LD_results = self.LD_executor_get().map(lie_derivative_worker, worker_args)
+        for (idx_perm_k, current_order_vector_field_str, _), (Lfh_serialized, dLfh_dx_serialized) in zip(LD_tasks, LD_results):
+            LD_parallel[current_order_vector_field_str] = (expr_loads(Lfh_serialized), expr_loads(dLfh_dx_serialized))
+            if self.LD_cache != None:
+                self.LD_cache.put(self.LD_cache_key(idx_perm_k), *LD_parallel[current_order_vector_field_str])
+        return LD_parallel
+
+    def LD_executor_get(self):
+        # Process pool of the parallel Lie derivatives. It is started at the first parallel batch of an ORC() call,
+        # so the workers receive x & f and import sympy once instead of once per batch.
+        if self.LD_executor == None:
+            self.LD_executor = ProcessPoolExecutor(max_workers=self.num_workers, initializer=lie_derivative_worker_init,
+                                                   initargs=(expr_dumps(self.x), [expr_dumps(f_i) for f_i in self.f],
+                                                             self.LD_simp_opt, self.LD_size_budget, self.backend_opt))
+        return self.LD_executor
+
+    def LD_executor_shutdown(self):
+        # Shut down the process pool of the parallel Lie derivatives
+        if self.LD_executor != None:
+            self.LD_executor.shutdown()
+            self.LD_executor = None
+
+    def LD_str_construct(self, idx_all_perm, k):
+        # Stream of (idx_perm_k, current_order_vector_field_str, previous_order_vector_field_str) of the k-th order Lie derivatives.
+        # Sequences with a zero vector field give zero Lie derivatives & are left out of the stream.
         for idx_perm_k_iter in idx_all_perm:
             idx_perm_k = [*idx_perm_k_iter]
+            if any(self.f_zero[idx_vector_field] for idx_vector_field in idx_perm_k):
+                continue
             # print(idx_perm_k)
             previous_order_vector_field_str = "k" + str(k-1)
             current_order_vector_field_str  = "k" + str(k)
@@ -67,16 +275,292 @@ class NOA():
             
             for idx_vector_field in idx_perm_k: 
                 current_order_vector_field_str  = current_order_vector_field_str + "f" + str(idx_vector_field)
+            yield idx_perm_k, current_order_vector_field_str, previous_order_vector_field_str
+
+    def obsv_mat_construct(self, idx_all_perm, k):
+        # The vector field sequences are streamed in batches of LD_batch_size and
+        # the gradient rows of the whole order are appended to obsv_mat at once
+        if self.checkpoint_dir != "" and os.path.exists(self.checkpoint_order_file_name(k)):
+            self.checkpoint_order_load(k)
+            return
+        time_start = time.perf_counter()
+        LD_stream = self.LD_str_construct(idx_all_perm, k)
+        obsv_mat_keys_buffer = []
+        while not self.full_rank_reached:
+            LD_list = list(islice(LD_stream, self.LD_batch_size))
+            if len(LD_list) == 0:
+                break
+            self.obsv_mat_construct_batch(LD_list, obsv_mat_keys_buffer)
+        self.obsv_mat_append(obsv_mat_keys_buffer)
+        # SymEngine gradients of the previous orders are no longer needed as inputs
+        self.dLfh_dx_se = {vector_field_str: dLfh_dx_se for vector_field_str, dLfh_dx_se in self.dLfh_dx_se.items()
+                           if vector_field_str.split("f")[0] == "k" + str(k)}
+        order_time = time.perf_counter() - time_start
+        self.stage_time_add("obsv_mat_construct", time_start)
+        time_start = time.perf_counter()
+        self.LD_count_ops_update(k)
+        self.stage_time_add("LD_count_ops", time_start)
+        self.order_metrics.append({"order": k, "time": order_time,
+                                   "rows": sum(self.dLfh_dx[vector_field_str].rows for vector_field_str in obsv_mat_keys_buffer),
+                                   "obsv_mat_rows": self.obsv_mat.rows,
+                                   "rank": rank_probe(self.obsv_basis) if self.rank_track_opt == "incremental" else None,
+                                   "count_ops": self.LD_count_ops[k]})
+        self.emit("order", **self.order_metrics[-1])
+        if self.checkpoint_dir != "":
+            time_start = time.perf_counter()
+            self.checkpoint_order_save(k, obsv_mat_keys_buffer)
+            self.stage_time_add("checkpoint_write", time_start)
+        if self.LD_free_opt:
+            self.LD_free(k)
+
+    def obsv_mat_append(self, obsv_mat_keys_append):
+        # Append the gradients of the Lie derivatives obsv_mat_keys_append to the observability matrix at once
+        self.obsv_mat = sp.Matrix.vstack(self.obsv_mat, *[self.dLfh_dx[vector_field_str] for vector_field_str in obsv_mat_keys_append])
+        self.obsv_mat_keys.extend(obsv_mat_keys_append)
+
+    def checkpoint_order_file_name(self, k):
+        return os.path.join(self.checkpoint_dir, self.name + "_" + self.checkpoint_digest[:16] + "_k" + str(k) + ".ckpt")
+
+    def checkpoint_order_save(self, k, obsv_mat_keys_buffer):
+        # Checkpoint of the k-th order Lie derivatives, the rows they appended to obsv_mat & the rank tracking state.
+        # The rows are the gradients dLfh_dx of the order, so only their keys are stored.
+        LD_order_str = [vector_field_str for vector_field_str in self.Lfh if vector_field_str.split("f")[0] == "k" + str(k)]
+        checkpoint_write(self.checkpoint_order_file_name(k), {
+            "Lfh": {vector_field_str: self.Lfh[vector_field_str] for vector_field_str in LD_order_str},
+            "dLfh_dx": {vector_field_str: self.dLfh_dx[vector_field_str] for vector_field_str in LD_order_str},
+            "obsv_mat_keys": obsv_mat_keys_buffer,
+            "obsv_basis": self.obsv_basis,
+            "rank_probe_points": self.rank_probe_points,
+            "LD_needed": self.LD_needed,
+            "full_rank_reached": self.full_rank_reached,
+            "LD_count_ops": self.LD_count_ops[k],
+        })
+        self.log("Lie derivative order", k, "checkpoint saved to", self.checkpoint_order_file_name(k))
+
+    def checkpoint_order_load(self, k):
+        # Resume the k-th order Lie derivatives from its checkpoint instead of computing them
+        time_start = time.perf_counter()
+        checkpoint = checkpoint_read(self.checkpoint_order_file_name(k))
+        self.stage_time_add("checkpoint_read", time_start)
+        self.Lfh.update(checkpoint["Lfh"])
+        self.dLfh_dx.update(checkpoint["dLfh_dx"])
+        self.obsv_mat_append(checkpoint["obsv_mat_keys"])
+        self.obsv_basis = checkpoint["obsv_basis"]
+        self.rank_probe_points = checkpoint["rank_probe_points"]
+        self.LD_needed = checkpoint["LD_needed"]
+        self.full_rank_reached = checkpoint["full_rank_reached"]
+        self.LD_count_ops[k] = checkpoint["LD_count_ops"]
+        self.log("Lie derivative order", k, "loaded from checkpoint", self.checkpoint_order_file_name(k))
+        if self.LD_free_opt:
+            self.LD_free(k)
+
+    def obsv_mat_construct_batch(self, LD_list, obsv_mat_keys_buffer):
+        # Lie derivatives of a batch of vector field sequences & their gradient rows
+        LD_parallel = {}
+        if self.num_workers > 1 and not self.full_rank_reached:
+            LD_parallel = self.lie_derivative_parallel(LD_list)
+
+        # merge the Lie derivatives into the observability matrix in the order of idx_all_perm
+        for idx_perm_k, current_order_vector_field_str, previous_order_vector_field_str in LD_list:
+            if self.full_rank_reached:
+                break
+            if current_order_vector_field_str in LD_parallel:
+                self.Lfh[current_order_vector_field_str], self.dLfh_dx[current_order_vector_field_str] = LD_parallel[current_order_vector_field_str]
+            elif self.LD_is_zero(idx_perm_k, previous_order_vector_field_str):
+                self.log("current Lie derivative: ", current_order_vector_field_str, " not appended to observability matrix due to null vector", level=2)
+                self.emit("LD", LD=current_order_vector_field_str, appended=False, rank=None)
+                continue
+            else:
+                self.Lfh[current_order_vector_field_str], self.dLfh_dx[current_order_vector_field_str] = self.lie_derivative_cached(idx_perm_k, current_order_vector_field_str, previous_order_vector_field_str)
+            if is_zero_mat(self.dLfh_dx[current_order_vector_field_str]):
+                self.log("current Lie derivative: ", current_order_vector_field_str, " not appended to observability matrix due to null vector", level=2)
+                self.emit("LD", LD=current_order_vector_field_str, appended=False, rank=None)
+            else:
+                obsv_mat_keys_buffer.append(current_order_vector_field_str)
+                self.log("current Lie derivative: ", current_order_vector_field_str, "appended to observability matrix", level=2)
+                if self.rank_track_opt == "incremental":
+                    self.rank_track(current_order_vector_field_str)
+                self.emit("LD", LD=current_order_vector_field_str, appended=True,
+                          rank=rank_probe(self.obsv_basis) if self.rank_track_opt == "incremental" else None)
+
+    def LD_count_ops_update(self, k):
+        # Total expression size (count_ops) of the k-th order Lie derivatives & their gradients
+        LD_order_str = [vector_field_str for vector_field_str in self.Lfh if vector_field_str.split("f")[0] == "k" + str(k)]
+        self.LD_count_ops[k] = {"Lfh": sum(sp.count_ops(list(self.Lfh[vector_field_str])) for vector_field_str in LD_order_str),
+                                "dLfh_dx": sum(sp.count_ops(list(self.dLfh_dx[vector_field_str])) for vector_field_str in LD_order_str)}
+        self.log("Lie derivative order", k, "count_ops: ", self.LD_count_ops[k])
+
+    def LD_free(self, k):
+        # Free the Lie derivatives that are no longer needed to construct order k+1:
+        # the k-th order Lie derivatives (only their gradients are extended) & the (k-1)-th order gradients
+        for vector_field_str in list(self.Lfh):
+            if int(vector_field_str.split("f")[0][1:]) == k:
+                del self.Lfh[vector_field_str]
+        for vector_field_str in list(self.dLfh_dx):
+            if int(vector_field_str.split("f")[0][1:]) == k-1:
+                del self.dLfh_dx[vector_field_str]
+
+    def rank_track(self, vector_field_str):
+        # Incremental rank tracking of the gradient rows of a Lie derivative, evaluated at the probe points
+        rows_points = obsv_mat_lambdify(self.dLfh_dx[vector_field_str], self.rank_probe_symbols)(self.rank_probe_points)
+        rank_increased = False
+        for idx_row in range(rows_points.shape[1]):
+            if rank_probe_update(self.obsv_basis, rows_points[:, idx_row, :], self.svd_tol):
+                rank_increased = True
+            rank = rank_probe(self.obsv_basis)
+            if rank == self.sys_order or rank == self.struct_rank:
+                self.full_rank_reached = True   # higher Lie derivative orders cannot exceed the structural rank
+                break
+        if rank_increased:
+            self.LD_needed.append(vector_field_str)
+            self.log("current Lie derivative: ", vector_field_str, "increased rank to", rank_probe(self.obsv_basis), level=2)
+
+    def numeric_params_construct(self):
+        # Numerical values of the parameters substituted into the observability matrix
+        if self.json_config_name != "":
+            with open(self.json_config_name) as json_file:
+                data = json.load(json_file)
+            # numeric_params_list = []
             
-            self.Lfh[current_order_vector_field_str]     = self.dLfh_dx[previous_order_vector_field_str] * self.f[idx_vector_field]
-            self.dLfh_dx[current_order_vector_field_str] = self.Lfh[current_order_vector_field_str].jacobian(self.x)
-            gradient_rows = self.dLfh_dx[current_order_vector_field_str].rows
-            gradient_cols = self.dLfh_dx[current_order_vector_field_str].cols
-            if(self.dLfh_dx[current_order_vector_field_str] == sp.zeros(gradient_rows,gradient_cols)):
-                print("current Lie derivative: ", current_order_vector_field_str, " not appended to observability matrix due to null vector")
+            # Get numeric_params from json config file
+            for keywords_params in self.params_config_subs:
+                numeric_params_get = data.get(str(keywords_params))
+                if numeric_params_get != None:
+                    numeric_params_tuple = (str(keywords_params), data[str(keywords_params)])
+                    self.numeric_params_dict[keywords_params] = data[str(keywords_params)]
+                else:
+                    self.numeric_params_dict[keywords_params] = 0.0
+                    self.log(f"{str(keywords_params)} is not found in {self.json_config_name}")
+                # numeric_params_list.append(numeric_params_tuple)
+            self.log("Substituted parameters with values from ", self.json_config_name)
+        else:
+            first_primes = []
+            number_of_first_primes = self.params_config_subs.rows
+            num = 1
+            while(len(first_primes) < number_of_first_primes):
+                num += 1
+                if num > 1:
+                    for i in range(2, num):
+                        if (num % i) == 0:
+                            break
+                    else:
+                        first_primes.append(num)
+            random.shuffle(first_primes)
+            
+            num = 0
+            for keywords_params in self.params_config_subs:
+                self.numeric_params_dict[keywords_params] = first_primes[num]
+                num += 1   
+            self.log("Substituted parameters with values from same-order prime numbers") 
+
+        # Update numeric_params_dict if there are new parameters      
+        if (self.new_params_dict != {}):
+            if self.numeric_params_dict != {}:
+                self.numeric_params_dict = {key: self.new_params_dict.get(key, self.numeric_params_dict[key]) for key in self.numeric_params_dict}
             else:
-                self.obsv_mat = self.obsv_mat.col_join(self.dLfh_dx[current_order_vector_field_str])
-                print("current Lie derivative: ", current_order_vector_field_str, "appended to observability matrix")
+                self.numeric_params_dict = {key: self.new_params_dict.get(key, self.new_params_dict[key]) for key in self.new_params_dict}
+            self.log("Updated numeric parameters dictionary!")
+        self.log("printing self.numeric_params_dict:")
+        self.log(self.numeric_params_dict)
+
+    def obsv_mat_compile(self):
+        # Compile the observability matrix into a vectorized numpy function of its free symbols
+        self.obsv_mat_symbols = sorted(self.obsv_mat.free_symbols, key=str)
+        self.obsv_mat_func = obsv_mat_lambdify(self.obsv_mat, self.obsv_mat_symbols)
+
+    def svd_params_construct(self):
+        # Parameters with fixed values in the svd rank calculation, from the json configuration file and new_params_dict.
+        # All other free symbols of the observability matrix are sampled randomly.
+        fixed_params_dict = {}
+        if self.json_config_name != "":
+            with open(self.json_config_name) as json_file:
+                data = json.load(json_file)
+            for keywords_params in self.params_config_subs:
+                if data.get(str(keywords_params)) != None:
+                    fixed_params_dict[keywords_params] = data[str(keywords_params)]
+        fixed_params_dict.update(self.new_params_dict)
+        return fixed_params_dict
+
+    def obsv_mat_svd_rank(self):
+        # Generic rank of the observability matrix from the singular values at random sample points
+        self.obsv_mat_compile()
+        rng = np.random.default_rng(self.svd_seed)
+        points = obsv_mat_sample_points(self.obsv_mat_symbols, self.svd_num_samples, self.svd_params_construct(), self.svd_sample_range, rng)
+        obsv_mat_batch = self.obsv_mat_func(points)
+        valid_points = np.all(np.isfinite(obsv_mat_batch), axis=(1,2))
+        if not np.any(valid_points):
+            raise ValueError("Observability matrix is not finite at any of the sample points")
+        ranks, self.singular_values = svd_rank(obsv_mat_batch[valid_points], self.svd_tol)
+        self.rank_obsv_mat = int(np.max(ranks))
+        self.sv_gap = min(sv_gap(singular_values, self.rank_obsv_mat, self.svd_tol) for singular_values, rank in zip(self.singular_values, ranks) if rank == self.rank_obsv_mat)
+        self.log("Ranks at", len(ranks), "sample points: ", ranks)
+        self.log("Singular value gap: ", self.sv_gap)
+
+    def obsv_map_points(self, points_dict, grid_shape, idx_start, idx_stop, fixed_params_dict, rng):
+        # Points idx_start ... idx_stop-1 of the observability map (N_batch x len(obsv_mat_symbols))
+        num_batch_points = idx_stop - idx_start
+        if grid_shape != None:
+            idx_grid = dict(zip(points_dict, np.unravel_index(np.arange(idx_start, idx_stop), grid_shape)))
+        points = np.empty((num_batch_points, len(self.obsv_mat_symbols)))
+        for idx_symbol, symbol in enumerate(self.obsv_mat_symbols):
+            if symbol in points_dict:
+                if grid_shape != None:
+                    points[:, idx_symbol] = points_dict[symbol][idx_grid[symbol]]
+                else:
+                    points[:, idx_symbol] = points_dict[symbol][idx_start:idx_stop]
+            elif symbol in fixed_params_dict:
+                points[:, idx_symbol] = float(fixed_params_dict[symbol])
+            else:
+                points[:, idx_symbol] = rng.uniform(self.svd_sample_range[0], self.svd_sample_range[1], size=num_batch_points)
+        return points
+
+    def obsv_map(self, points_dict, grid=False):
+        # Observability map: rank, smallest singular value & condition number of the observability matrix at many operating points.
+        # The compiled observability matrix is evaluated in batches of obsv_map_batch_size points without per-point sympy calls.
+        # Input args:
+        # points_dict = {symbol: values} of states & parameters
+        # grid        = True to evaluate the grid spanned by the values (cartesian product),
+        #               False to evaluate a sample of points where all values have the same length
+        # Symbols not in points_dict keep their value from svd_params_construct() or are sampled uniformly from svd_sample_range.
+        #
+        # Output args:
+        # ranks, sv_min, cond_num = arrays of the grid shape, or of the sample length
+        if self.obsv_mat_func == None:
+            self.obsv_mat_compile()
+        points_dict = {symbol: np.asarray(values, dtype=float).ravel() for symbol, values in points_dict.items()}
+        if grid:
+            grid_shape = tuple(len(values) for values in points_dict.values())
+            num_points = int(np.prod(grid_shape))
+        else:
+            grid_shape = None
+            num_points_set = {len(values) for values in points_dict.values()}
+            if len(num_points_set) != 1:
+                raise ValueError("All values of a sample of points must have the same length")
+            num_points = num_points_set.pop()
+        fixed_params_dict = self.svd_params_construct()
+        rng = np.random.default_rng(self.svd_seed)
+        points_batches = (self.obsv_map_points(points_dict, grid_shape, idx_start, min(idx_start+self.obsv_map_batch_size, num_points), fixed_params_dict, rng)
+                          for idx_start in range(0, num_points, self.obsv_map_batch_size))
+        ranks, sv_min, cond_num = obsv_mat_map(self.obsv_mat_func, points_batches, self.svd_tol)
+        if grid:
+            return ranks.reshape(grid_shape), sv_min.reshape(grid_shape), cond_num.reshape(grid_shape)
+        return ranks, sv_min, cond_num
+
+    def struct_screen(self):
+        # Structural observability screen from the state dependencies of f & h, without symbolic Lie derivatives
+        self.struct_rank, self.struct_LD_order, unobservable_idx, rank_bound_order = struct_screen(self.x, self.f, self.h)
+        self.struct_unobsv = [self.x[idx_x] for idx_x in unobservable_idx]
+        self.log("Structural rank upper bound: ", self.struct_rank, ", reached at Lie derivative order", self.struct_LD_order)
+        if self.struct_rank < self.sys_order:
+            self.log("The system is structurally NOT weakly locally observable (WLO)")
+        if len(self.struct_unobsv) > 0:
+            self.log("Structurally unobservable states: ", self.struct_unobsv)
+
+    def LD_order_zero(self, k):
+        # True if all gradients of the k-th order Lie derivatives are zero, including an order without stored Lie derivatives.
+        # The Lie derivatives of all higher orders are then zero too, so appending them cannot add rows or rank.
+        return all(is_zero_mat(self.dLfh_dx[vector_field_str]) for vector_field_str in self.dLfh_dx
+                   if vector_field_str.split("f")[0] == "k" + str(k))
 
     def ORC(self):
         # Observability Rank Criterion (ORC) for Nonlinear Observability Analysis (NOA)
@@ -92,41 +576,105 @@ class NOA():
         # obsv_mat = observability matrix
         #
         # Reference: Continuous Symmetries and Observability Properties in Autonomous Navigation (Martinelli, 2010)
+        try:
+            self.ORC_run()
+        finally:
+            self.LD_executor_shutdown()     # the process pool is shared by all orders & batches of the ORC() call
+            self.dLfh_dx_se = {}            # SymEngine gradients are only the inputs of the next order
 
+    def ORC_run(self):
         # Observability rank criterion
         self.sys_order = self.x.rows      # order of system / number of states
         self.num_inputs = len(self.f)-1   # number of inputs
+        self.struct_rank = int(-1)
+        self.struct_LD_order = int(0)
+        if self.struct_screen_opt:
+            time_start = time.perf_counter()
+            self.struct_screen()
+            self.stage_time_add("struct_screen", time_start)
         if (self.LD_order == 0):
-            self.LD_order = self.num_inputs
+            self.LD_order = max(self.num_inputs, self.struct_LD_order)   # orders below struct_LD_order cannot reach the structural rank
+
+        if self.rank_calc_opt == "numeric" or self.rank_calc_opt == "numerical":
+            self.numeric_params_construct()
+
+        if self.combn_permn_opt == "pruned" and self.rank_track_opt != "incremental":
+            raise ValueError("combn_permn_opt = \"pruned\" requires rank_track_opt = \"incremental\"")
+
+        if self.LD_simp_opt not in expr_simp_policies:
+            raise ValueError("Unknown LD_simp_opt: " + str(self.LD_simp_opt))
+        if self.backend_opt not in ("sympy", "symengine"):
+            raise ValueError("Unknown backend_opt: " + str(self.backend_opt))
+        self.dLfh_dx_se = {}
+        if self.backend_opt == "symengine":
+            # converted once per ORC() call, the Lie derivative chain stays in SymEngine
+            self.x_se = to_symengine(self.x)
+            self.f_se = [to_symengine(f_i) for f_i in self.f]
+
+        # digests of the model, expression management policy & backend for the Lie derivatives cache keys
+        if self.LD_cache != None:
+            self.LD_cache_x_h_digest = self.LD_cache.digest((self.x, self.h)) + ":" + self.LD_simp_opt + ":" + str(self.LD_size_budget) + ":" + self.backend_opt
+            self.LD_cache_f_digests = [self.LD_cache.digest(f_i) for f_i in self.f]
+
+        self.f_zero = [is_zero_mat(f_i) for f_i in self.f]
+
+        # digest of the model & the options that change the Lie derivatives or the rank tracking for the checkpoint file names
+        if self.checkpoint_dir != "":
+            if not os.path.exists(self.checkpoint_dir):
+                os.makedirs(self.checkpoint_dir)
+            checkpoint_config = [self.x, self.h, *self.f, self.combn_permn_opt, self.LD_simp_opt, self.LD_size_budget, self.backend_opt, self.rank_track_opt,
+                                 self.struct_screen_opt]
+            if self.rank_track_opt == "incremental":
+                # the probe points are stored in the checkpoints, only the options that change them between runs are in the digest
+                checkpoint_config += [self.rank_calc_opt, self.svd_tol, self.svd_num_samples]
+                if self.rank_calc_opt == "numeric" or self.rank_calc_opt == "numerical":
+                    checkpoint_config.append(sorted(self.numeric_params_dict.items(), key=str))
+            self.checkpoint_digest = hashlib.sha256(sp.srepr(checkpoint_config).encode()).hexdigest()
+
+        # reset incremental rank tracking, expression size & order metrics records & compiled observability matrix
+        self.order_metrics = []
+        self.obsv_mat_func = None
+        self.LD_count_ops = {}
+        self.obsv_basis = []
+        if self.rank_track_opt == "incremental":
+            self.rank_probe_init()
+        self.LD_needed = []
+        self.full_rank_reached = False
 
         # zero-th order Lie derivative & its gradient wrt x
         self.Lfh = {"k0": self.h}
-        self.dLfh_dx = {"k0": self.Lfh["k0"].jacobian(self.x)}
+        self.dLfh_dx = {"k0": sparse_jacobian(self.Lfh["k0"], self.x)}
         self.obsv_mat = self.dLfh_dx["k0"]                # initialize observability matrix
+        self.obsv_mat_keys = ["k0"]
+        if self.rank_track_opt == "incremental":
+            self.rank_track("k0")
 
         # k-th order Lie derivative & its gradient wrt x
         if self.combn_permn_opt == "combination":
-            print("Combination of Vector Fields")
+            self.log("Combination of Vector Fields")
             for k in range(1,self.LD_order+1):
-                idx_all_perm = [*combinations(list(range(self.num_inputs+1)), k)]
-                print(idx_all_perm)
+                idx_all_perm = combinations(list(range(self.num_inputs+1)), k)
+                self.log("Lie derivative order", k, ":", comb(self.num_inputs+1, k), "vector field combinations")
                 self.obsv_mat_construct(idx_all_perm, k)
-            while (self.obsv_mat.rows < self.obsv_mat.cols):
+                if self.full_rank_reached:
+                    break
+            while (self.obsv_mat.rows < self.obsv_mat.cols) and not self.full_rank_reached and not self.LD_order_zero(self.LD_order):
                 self.LD_order += 1
                 if (self.LD_order < self.num_inputs):
-                    print("Insufficient obv_mat rows. Appending Lie derivative order ", self.LD_order, " to obsv_mat ...")
-                    idx_all_perm = [*combinations(list(range(self.num_inputs+1)), self.LD_order)]
-                    print(idx_all_perm)
+                    self.log("Insufficient obv_mat rows. Appending Lie derivative order ", self.LD_order, " to obsv_mat ...")
+                    idx_all_perm = combinations(list(range(self.num_inputs+1)), self.LD_order)
+                    self.log("Lie derivative order", self.LD_order, ":", comb(self.num_inputs+1, self.LD_order), "vector field combinations")
                     self.obsv_mat_construct(idx_all_perm, self.LD_order)
                 else:
                     break
-            print("Insufficient obsv_mat rows. Auto-construct obsv_mat using Permutation of vector fields ...")
-            self.combn_permn_opt = "permutation"
-            self.ORC()  
+            if not self.full_rank_reached:
+                self.log("Insufficient obsv_mat rows. Auto-construct obsv_mat using Permutation of vector fields ...")
+                self.combn_permn_opt = "permutation"
+                self.ORC()  
                 
         
         elif self.combn_permn_opt == "drift2ndOrder":
-            print("Drift 2nd Order Vector Fields")
+            self.log("Drift 2nd Order Vector Fields")
             for k in range(1, 2+1):
                 if k==1:
                     idx_all_perm = [*combinations(list(range(self.num_inputs+1)), k)]
@@ -134,15 +682,15 @@ class NOA():
                     idx_all_perm = []
                     for i2 in range(1, self.num_inputs+1):
                         idx_all_perm.append((0, i2))
-                print(idx_all_perm)
+                self.log(idx_all_perm, level=2)
                 self.obsv_mat_construct(idx_all_perm, k)
-            if (self.obsv_mat.rows < self.obsv_mat.cols):  
-                print("Insufficient obsv_mat rows. Auto-construct obsv_mat using Permutation of vector fields ...")
+            if (self.obsv_mat.rows < self.obsv_mat.cols) and not self.full_rank_reached:  
+                self.log("Insufficient obsv_mat rows. Auto-construct obsv_mat using Permutation of vector fields ...")
                 self.combn_permn_opt = "permutation"
                 self.ORC()          
         
         elif self.combn_permn_opt == "drift2ndOrderWuest":
-            print("Drift 2nd Order Vector Fields Wuest 2019")
+            self.log("Drift 2nd Order Vector Fields Wuest 2019")
             for k in range(1, 2+1):
                 if k==1:
                     idx_all_perm = [*combinations(list(range(self.num_inputs+1)), k)]
@@ -150,106 +698,150 @@ class NOA():
                     idx_all_perm = []
                     for i2 in range(1, self.num_inputs+1):
                         idx_all_perm.append((i2, 0))
-                print(idx_all_perm)
+                self.log(idx_all_perm, level=2)
                 self.obsv_mat_construct(idx_all_perm, k)
-            if (self.obsv_mat.rows < self.obsv_mat.cols):  
-                print("Insufficient obsv_mat rows. Auto-construct obsv_mat using Permutation of vector fields ...")
+            if (self.obsv_mat.rows < self.obsv_mat.cols) and not self.full_rank_reached:  
+                self.log("Insufficient obsv_mat rows. Auto-construct obsv_mat using Permutation of vector fields ...")
                 self.combn_permn_opt = "permutation"
                 self.ORC()   
         
+        elif self.combn_permn_opt == "pruned":
+            # Spanning-set expansion: only the Lie derivatives whose gradients increased the rank
+            # are extended to the next order. A gradient in the span of the existing rows
+            # cannot contribute new directions in any of its higher order Lie derivatives.
+            self.log("Pruned Expansion of Vector Fields")
+            k = 0
+            idx_prev_independent = [()]
+            while idx_prev_independent and not self.full_rank_reached:
+                k += 1
+                idx_all_perm = []
+                for idx_prev in idx_prev_independent:
+                    for i in range(self.num_inputs+1):
+                        idx_all_perm.append(idx_prev + (i,))
+                self.log(idx_all_perm, level=2)
+                self.obsv_mat_construct(idx_all_perm, k)
+                idx_prev_independent = [self.LD_str_to_idx(vector_field_str) for vector_field_str in self.LD_needed
+                                        if vector_field_str.startswith("k" + str(k) + "f")]
+            self.LD_order = k
+
         else:
-            print("Permutation of Vector Fields")
+            self.log("Permutation of Vector Fields")
             for k in range(1,self.LD_order+1):
-                idx_all_perm = [*self.permn_rep(list(range(self.num_inputs+1)), k)]
-                print(idx_all_perm)
+                idx_all_perm = self.permn_rep(list(range(self.num_inputs+1)), k)
+                self.log("Lie derivative order", k, ":", (self.num_inputs+1)**k, "vector field permutations")
                 self.obsv_mat_construct(idx_all_perm, k)
-            while (self.obsv_mat.rows < self.obsv_mat.cols):
+                if self.full_rank_reached:
+                    break
+            while (self.obsv_mat.rows < self.obsv_mat.cols) and not self.full_rank_reached and not self.LD_order_zero(self.LD_order):
                 self.LD_order += 1
-                print("Insufficient obv_mat rows. Appending Lie derivative order ",self.LD_order, " to obsv_mat ...")
-                idx_all_perm = [*self.permn_rep(list(range(self.num_inputs+1)), self.LD_order)]
-                print(idx_all_perm)
+                self.log("Insufficient obv_mat rows. Appending Lie derivative order ",self.LD_order, " to obsv_mat ...")
+                idx_all_perm = self.permn_rep(list(range(self.num_inputs+1)), self.LD_order)
+                self.log("Lie derivative order", self.LD_order, ":", (self.num_inputs+1)**self.LD_order, "vector field permutations")
                 self.obsv_mat_construct(idx_all_perm, self.LD_order)
                 
-        if self.rank_calc_opt == "numeric" or self.rank_calc_opt == "numerical":
-            if self.json_config_name != "":
-                with open(self.json_config_name) as json_file:
-                    data = json.load(json_file)
-                # numeric_params_list = []
-                
-                # Get numeric_params from json config file
-                for keywords_params in self.params_config_subs:
-                    numeric_params_get = data.get(str(keywords_params))
-                    if numeric_params_get != None:
-                        numeric_params_tuple = (str(keywords_params), data[str(keywords_params)])
-                        self.numeric_params_dict[keywords_params] = data[str(keywords_params)]
-                    else:
-                        self.numeric_params_dict[keywords_params] = 0.0
-                        print(f"{str(keywords_params)} is not found in {self.json_config_name}")
-                    # numeric_params_list.append(numeric_params_tuple)
-                print("Substituted parameters with values from ", self.json_config_name)
-            else:
-                first_primes = []
-                number_of_first_primes = self.params_config_subs.rows
-                num = 1
-                while(len(first_primes) < number_of_first_primes):
-                    num += 1
-                    if num > 1:
-                        for i in range(2, num):
-                            if (num % i) == 0:
-                                break
-                        else:
-                            first_primes.append(num)
-                random.shuffle(first_primes)
-                
-                num = 0
-                for keywords_params in self.params_config_subs:
-                    self.numeric_params_dict[keywords_params] = first_primes[num]
-                    num += 1   
-                print("Substituted parameters with values from same-order prime numbers") 
-
-            # Update numeric_params_dict if there are new parameters      
-            if (self.new_params_dict != {}):
-                if self.numeric_params_dict != {}:
-                    self.numeric_params_dict = {key: self.new_params_dict.get(key, self.numeric_params_dict[key]) for key in self.numeric_params_dict}
-                else:
-                    self.numeric_params_dict = {key: self.new_params_dict.get(key, self.new_params_dict[key]) for key in self.new_params_dict}
-                print("Updated numeric parameters dictionary!")
-            print("printing self.numeric_params_dict:")
-            print(self.numeric_params_dict)
+        time_start = time.perf_counter()
+        if self.rank_calc_opt == "svd":
+            self.log("\nCalculating generic rank of observability matrix by SVD at", self.svd_num_samples, "random sample points ...")
+            self.obsv_mat_svd_rank()
+        elif self.rank_calc_opt == "numeric" or self.rank_calc_opt == "numerical":
             # self.obsv_mat_num = self.obsv_mat.subs(numeric_params_list)
             self.obsv_mat_num = self.obsv_mat.xreplace(self.numeric_params_dict)
-            print("\nCalculating rank of numerical observability matrix ...")
-            self.rank_obsv_mat = self.obsv_mat_num.rank()    
+            self.log("\nCalculating rank of numerical observability matrix ...")
+            if self.rank_track_opt == "incremental":
+                self.rank_obsv_mat = rank_probe(self.obsv_basis)
+            else:
+                self.rank_obsv_mat = self.obsv_mat_num.rank()    
+        elif self.rank_track_opt == "incremental":
+            self.log("\nRank of symbolic observability matrix from incremental rank tracking")
+            self.rank_obsv_mat = rank_probe(self.obsv_basis)
         else:
-            print("\nCalculating rank of symbolic observability matrix ...")
-            self.rank_obsv_mat = self.obsv_mat.rank()
+            self.log("\nCalculating rank of symbolic observability matrix ...")
+            if self.linalg_opt == "domain":
+                self.rank_obsv_mat = domain_rank(self.obsv_mat)
+            else:
+                self.rank_obsv_mat = self.obsv_mat.rank()
+        self.stage_time_add("rank", time_start)
+        self.emit("rank", rank=self.rank_obsv_mat, sys_order=self.sys_order)
         
         if(self.rank_obsv_mat == self.sys_order):
-            print("The system is weakly locally observable (WLO)")
+            self.log("The system is weakly locally observable (WLO)")
         else:
-            print("The system is NOT weakly locally observable (WLO)!"); 
-            print("Dimension of largest WLO subsystem (Observable & Jointly Observable): ", self.rank_obsv_mat)
-            print("Dimension of Undistinguishable Region (Unobservable): ", self.sys_order-self.rank_obsv_mat)            
+            self.log("The system is NOT weakly locally observable (WLO)!"); 
+            self.log("Dimension of largest WLO subsystem (Observable & Jointly Observable): ", self.rank_obsv_mat)
+            self.log("Dimension of Undistinguishable Region (Unobservable): ", self.sys_order-self.rank_obsv_mat)
+        if self.rank_track_opt == "incremental":
+            self.log("Lie derivatives needed for rank", self.rank_obsv_mat, ": ", self.LD_needed)
+        if self.LD_cache != None:
+            self.log("Lie derivatives cache hits: ", self.LD_cache.hits, ", misses: ", self.LD_cache.misses)            
+
+    def observable_mode_numeric(self):
+        # Continuous symmetries by SVD of the compiled observability matrix at svd_num_samples random sample points.
+        # The states are classified from the sparsity of the nullspace bases, consistently across the sample points.
+        if self.obsv_mat_func == None:
+            self.obsv_mat_compile()
+        rng = np.random.default_rng(self.svd_seed)
+        points = obsv_mat_sample_points(self.obsv_mat_symbols, self.svd_num_samples, self.svd_params_construct(), self.svd_sample_range, rng)
+        obsv_mat_batch = self.obsv_mat_func(points)
+        obsv_mat_batch = obsv_mat_batch[np.all(np.isfinite(obsv_mat_batch), axis=(1,2))]
+        if obsv_mat_batch.shape[0] == 0:
+            raise ValueError("Observability matrix is not finite at any of the sample points")
+        ranks, _ = svd_rank(obsv_mat_batch, self.svd_tol)
+        rank = int(np.max(ranks))
+        null_bases = svd_nullspace(obsv_mat_batch[ranks == rank], rank)     # singular sample points are excluded
+        observable_mask, unobservable_mask, joint_mask = null_state_classify(null_bases, self.null_tol)
+
+        self.obsv_modes = ObsvModes()
+        self.obsv_modes.rank = rank
+        self.obsv_modes.observable = [self.x[idx_x] for idx_x in np.flatnonzero(observable_mask)]
+        self.obsv_modes.jointly_observable = [self.x[idx_x] for idx_x in np.flatnonzero(joint_mask)]
+        self.obsv_modes.unobservable = [self.x[idx_x] for idx_x in np.flatnonzero(unobservable_mask)]
+        self.obsv_modes.cont_symm = null_bases
+        self.cont_symm = [sp.Matrix(null_bases[0][:, idx_ws]) for idx_ws in range(null_bases.shape[2])]
+        if self.null_verify_opt:
+            self.obsv_modes.verified = self.obsv_modes_verify()
+        self.log(self.obsv_modes)
+        return self.obsv_modes
+
+    def obsv_modes_verify(self):
+        # Symbolic verification of the numeric state classification:
+        # a state is observable if its standard basis vector is in the row space of obsv_mat,
+        # and unobservable if its column of obsv_mat is zero.
+        obsv_mat_rank = domain_rank if self.linalg_opt == "domain" else (lambda obsv_mat: obsv_mat.rank())
+        rank_obsv_mat = obsv_mat_rank(self.obsv_mat)
+        verified = {}
+        for state in self.obsv_modes.observable:
+            unit_row = sp.zeros(1, self.sys_order)
+            unit_row[list(self.x).index(state)] = 1
+            verified[state] = obsv_mat_rank(self.obsv_mat.col_join(unit_row)) == rank_obsv_mat
+        for state in self.obsv_modes.unobservable:
+            verified[state] = all(self.is_zero_expr(expr) for expr in self.obsv_mat.col(list(self.x).index(state)))
+        return verified
 
     # Observable, joint observable, and unobservable states
     def observable_mode(self):
+        time_start = time.perf_counter()
         if self.null_calc_opt == "numeric" or self.null_calc_opt == "numerical":
-            self.cont_symm = self.obsv_mat_num.nullspace()  # numerical continous symmetries
+            obsv_modes = self.observable_mode_numeric()    # numerical continous symmetries
+            self.stage_time_add("nullspace", time_start)
+            return obsv_modes
+        elif self.linalg_opt == "domain":
+            self.cont_symm = domain_nullspace(self.obsv_mat)   # symbolic continous symmetries by fraction-free elimination
         else:
             self.cont_symm = self.obsv_mat.nullspace()      # symbolic continous symmetries
+        self.stage_time_add("nullspace", time_start)
         
         if len(self.cont_symm) == 0:
-            print("All states are observable")
-            display(self.x.T)
+            self.log("All states are observable")
+            self.display_expr(self.x.T)
         else:
-            print("The observable modes are g(x) which satisfiy these partial differential equations (PDE): ")
+            self.log("The observable modes are g(x) which satisfiy these partial differential equations (PDE): ")
             dg_latex = sp.Symbol('{\partial g(\mathbf{x})}')
             par_diff_latex = sp.symbols('\partial')
             for ws in self.cont_symm:
                 pde_latex = 0
                 for idx_x in range(self.sys_order):
                     pde_latex += ws[idx_x]*dg_latex/(par_diff_latex*self.x[idx_x])
-                display(sp.Eq(pde_latex, 0))
+                self.display_expr(sp.Eq(pde_latex, 0))
 
             all_standard_basis      = True
             list_of_list_zero_idx   = [[]]*len(self.cont_symm)
@@ -293,10 +885,10 @@ class NOA():
                 self.nonobsv_subspace   = self.cont_symm_mat.T*self.x  # unobservable states
                 set_nonobsv_subspace    = set(self.nonobsv_subspace)
                 self.obsv_subspace      = set(self.x) - set_nonobsv_subspace
-                print("Observable states: ")
-                display(self.obsv_subspace)
-                print("Unobservable states: ")
-                display(set_nonobsv_subspace)   
+                self.log("Observable states: ")
+                self.display_expr(self.obsv_subspace)
+                self.log("Unobservable states: ")
+                self.display_expr(set_nonobsv_subspace)   
             else:
                 for ws in self.cont_symm:
                     g = sp.Function('g')
@@ -317,21 +909,44 @@ class NOA():
                         genform += ws[idx_x]*u.diff(self.x[idx_x])
                     # TODO: Solve partial differential equation for more than 2 state variables in sympy
                     # sol = pdsolve(genform)
-                    print("Observable modes: ")
+                    from sympy.solvers.pde import checkpdesol
+                    self.log("Observable modes: ")
                     for obsv_idx in set_obsv_idx:
                         sol = self.x[obsv_idx]
                         check_sol = (checkpdesol(genform, sol))
                         if check_sol[0] == True:
-                            display(sol)
+                            self.display_expr(sol)
     
+    # Attributes stored by save()
+    save_attrs = ["x", "f", "h", "sys_order", "num_inputs", "json_config_name", "params_config_subs", "new_params_dict",
+                  "combn_permn_opt", "LD_order", "Lfh", "dLfh_dx", "LD_simp_opt", "LD_size_budget", "LD_count_ops", "backend_opt",
+                  "struct_rank", "struct_LD_order", "struct_unobsv",
+                  "rank_calc_opt", "numeric_params_dict", "obsv_mat", "obsv_mat_keys", "obsv_mat_num", "rank_obsv_mat", "linalg_opt",
+                  "rank_track_opt", "obsv_basis", "rank_probe_points", "LD_needed", "full_rank_reached",
+                  "null_calc_opt", "cont_symm", "stage_times"]
+
     def save(self, dir):
+        # Compact checkpoint of the model, Lie derivatives & results as zlib-compressed srepr
         now = datetime.now()
         if not os.path.exists(dir):
             os.makedirs(dir)
         self.backup_name = dir + "/" + self.name +"_"+ str(self.LD_order) + "OrderLD_" + self.combn_permn_opt + "_" + str(now.strftime("%Y-%m-%d_%H-%M-%S"))
-        with open(self.backup_name+".pkl", 'wb') as file:
-            pickle.dump(self, file)
-        print("Pickle file saved to " + self.backup_name + ".pkl")
-        dill_dumps = dill.dumps(self)
-        dill.dump_session(self.backup_name + ".db")
-        print("Dill file saved to " + self.backup_name + ".db")
\ No newline at end of file
+        checkpoint = {"name": self.name, **{attr: getattr(self, attr) for attr in self.save_attrs}}
+        if len(self.obsv_mat_keys) > 0 and all(vector_field_str in self.dLfh_dx for vector_field_str in self.obsv_mat_keys) \
+                and sum(self.dLfh_dx[vector_field_str].rows for vector_field_str in self.obsv_mat_keys) == self.obsv_mat.rows:
+            del checkpoint["obsv_mat"]      # the rows are the gradients dLfh_dx, load() stacks them again
+        time_start = time.perf_counter()
+        checkpoint_write(self.backup_name + ".noa", checkpoint)
+        self.stage_time_add("checkpoint_write", time_start)
+        self.log("Checkpoint file saved to " + self.backup_name + ".noa")
+
+    @staticmethod
+    def load(file_name, verbose=1):
+        # NOA object from a checkpoint file of save()
+        checkpoint = checkpoint_read(file_name)
+        noa = NOA(checkpoint.pop("name"), verbose)
+        for attr, value in checkpoint.items():
+            setattr(noa, attr, value)
+        if "obsv_mat" not in checkpoint:
+            noa.obsv_mat = sp.Matrix.vstack(*[noa.dLfh_dx[vector_field_str] for vector_field_str in noa.obsv_mat_keys])
+        return noa
\ No newline at end of file
@@ -0,0 +1,13 @@
+class ObsvModes():
+    # Classification of the states of a system from the continuous symmetries (nullspace) of its observability matrix
+    def __init__(self):
+        self.rank = int(0)                      # rank of the observability matrix
+        self.observable = []                    # observable states
+        self.jointly_observable = []            # states that are only observable in linear combinations with other states
+        self.unobservable = []                  # unobservable states
+        self.cont_symm = []                     # continuous symmetries (nullspace basis) at each sample point
+        self.verified = None                    # {state: True/False} symbolic verification of the classification, None if not verified
+
+    def __repr__(self):
+        return ("ObsvModes(rank=" + str(self.rank) + ", observable=" + str(self.observable)
+                + ", jointly_observable=" + str(self.jointly_observable) + ", unobservable=" + str(self.unobservable) + ")")
@@ -1,2 +1,5 @@
 from .NOA import NOA
-from .quat_sympy import *
\ No newline at end of file
+from .LDCache import LDCache
+from .ObsvModes import ObsvModes
+from .quat_sympy import *
+from .quat_numpy import *
\ No newline at end of file
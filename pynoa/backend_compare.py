@@ -0,0 +1,41 @@
+import random
+import sys
+
+from .models import models
+
+def backend_compare(model_names=None, seed=0, **NOA_opts):
+    # Compare the ranks of the observability matrix computed by the sympy & symengine backends on the notebook models
+    # Input args:
+    # model_names = names of the models in the models registry, None for all models
+    # seed        = random seed of the svd sample points & numeric rank parameters, the same for both backends
+    # NOA_opts    = NOA attributes that override the notebook options, e.g. LD_order=1.
+    #               The rank is calculated by svd unless rank_calc_opt is given, because only the Lie derivatives
+    #               depend on the backend and the numeric rank of the notebooks takes minutes.
+    #
+    # Output args:
+    # results = {model name: {"sympy": rank, "symengine": rank, "identical": True/False}}
+    if model_names == None:
+        model_names = list(models)
+    NOA_opts = {"rank_calc_opt": "svd", "svd_seed": seed, **NOA_opts}
+    results = {}
+    for model_name in model_names:
+        results[model_name] = {}
+        for backend in ("sympy", "symengine"):
+            model = models[model_name]()
+            model.backend_opt = backend
+            model.LD_cache = None
+            for NOA_opt, value in NOA_opts.items():
+                setattr(model, NOA_opt, value)
+            random.seed(seed)
+            model.ORC()
+            results[model_name][backend] = model.rank_obsv_mat
+        results[model_name]["identical"] = results[model_name]["sympy"] == results[model_name]["symengine"]
+    for model_name, result in results.items():
+        print(model_name, ": sympy rank", result["sympy"], ", symengine rank", result["symengine"],
+              ", identical" if result["identical"] else ", DIFFERENT")
+    return results
+
+if __name__ == "__main__":
+    # python -m pynoa.backend_compare [model names ...]
+    results = backend_compare(sys.argv[1:] or None)
+    sys.exit(0 if all(result["identical"] for result in results.values()) else 1)
@@ -0,0 +1,168 @@
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from itertools import product
+
+import numpy as np
+import sympy as sp
+
+from .models import models
+
+# Options of the default benchmark grid
+benchmark_grid = {
+    "combn_permn_opt": ["permutation", "combination", "drift2ndOrder", "drift2ndOrderWuest", "pruned"],
+    "LD_order": [1, 2],
+    "rank_calc_opt": ["symbolic", "numeric", "svd"],
+    "null_calc_opt": ["symbolic", "numeric"],
+}
+
+def peak_memory():
+    # Peak resident memory of the current process in bytes, None if it is not available on the platform
+    try:
+        import resource
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss*1024
+
+def benchmark_case(case, seed, queue):
+    # Run ORC & observable_mode of one benchmark case and put its record into the queue.
+    # Each case runs in a fresh process, so the peak memory and the sympy caches belong to this case only.
+    record = dict(case)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            model = models[case["model"]]()
+            model.verbose = 0
+            model.LD_cache = None
+            model.svd_seed = seed
+            for NOA_opt in benchmark_grid:
+                if NOA_opt in case:
+                    setattr(model, NOA_opt, case[NOA_opt])
+            if model.combn_permn_opt == "pruned":
+                model.rank_track_opt = "incremental"    # pruned expansion requires incremental rank tracking
+            random.seed(seed)
+            model.stage_times = {}
+            time_start = time.perf_counter()
+            model.ORC()
+            model.observable_mode()
+            record["total_time"] = time.perf_counter() - time_start
+        record["status"] = "ok"
+        record["stage_times"] = model.stage_times
+        record["peak_memory"] = peak_memory()
+        record["rank_obsv_mat"] = int(model.rank_obsv_mat)
+        record["obsv_mat_shape"] = list(model.obsv_mat.shape)
+        record["obsv_mat_count_ops"] = int(sp.count_ops(list(model.obsv_mat)))
+        record["LD_count_ops"] = {str(k): count_ops for k, count_ops in model.LD_count_ops.items()}
+    except Exception as error:
+        record["status"] = "error"
+        record["error"] = repr(error)
+    queue.put(record)
+
+def benchmark_run_case(case, seed=0, timeout=600):
+    # Run a benchmark case in a separate process, which is terminated after timeout seconds
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=benchmark_case, args=(case, seed, queue))
+    process.start()
+    try:
+        record = queue.get(timeout=timeout)
+    except Exception:
+        record = dict(case)
+        record["status"] = "timeout"
+    process.join(1)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+    return record
+
+def benchmark_env():
+    # Versions & platform of a benchmark run, to compare the results between versions
+    try:
+        git_commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                    capture_output=True, text=True).stdout.strip()
+    except OSError:
+        git_commit = ""
+    return {"date": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": git_commit,
+            "python": platform.python_version(),
+            "sympy": sp.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform()}
+
+def benchmark(model_names=None, grid=None, seed=0, timeout=600, results_file_name=""):
+    # Benchmark suite of the notebook models over a grid of ORC & observable_mode options
+    # Input args:
+    # model_names       = names of the models in the models registry, None for all models
+    # grid              = {NOA option: list of values}, None for benchmark_grid
+    # seed              = random seed of the numeric parameters & svd sample points
+    # timeout           = time limit of each case in seconds
+    # results_file_name = json file of the results, "" to not save them
+    #
+    # Output args:
+    # results = {"env": versions & platform, "results": [record of each case]}
+    if model_names == None:
+        model_names = list(models)
+    if grid == None:
+        grid = benchmark_grid
+    results = {"env": benchmark_env(), "seed": seed, "timeout": timeout, "results": []}
+    for model_name in model_names:
+        for values in product(*grid.values()):
+            case = {"model": model_name, **dict(zip(grid, values))}
+            record = benchmark_run_case(case, seed, timeout)
+            results["results"].append(record)
+            print(benchmark_case_str(record), ":", record["status"], record.get("total_time", ""))
+            if results_file_name != "":
+                with open(results_file_name, "w") as results_file:
+                    json.dump(results, results_file, indent=1)
+    return results
+
+def benchmark_case_str(record):
+    # Name of a benchmark case from its model & options
+    return " ".join([record["model"]] + [str(record[NOA_opt]) for NOA_opt in benchmark_grid if NOA_opt in record])
+
+def benchmark_compare(old_results_file_name, new_results_file_name):
+    # Compare the total time & peak memory of the cases of two benchmark result files.
+    # Returns {case: {"time_ratio": new/old, "memory_ratio": new/old}} of the cases that succeeded in both files
+    with open(old_results_file_name) as old_results_file:
+        old_results = {benchmark_case_str(record): record for record in json.load(old_results_file)["results"]}
+    with open(new_results_file_name) as new_results_file:
+        new_results = {benchmark_case_str(record): record for record in json.load(new_results_file)["results"]}
+    comparison = {}
+    for case_str, new_record in new_results.items():
+        old_record = old_results.get(case_str)
+        if old_record == None or old_record["status"] != "ok" or new_record["status"] != "ok":
+            if old_record != None and old_record["status"] != new_record["status"]:
+                print(case_str, ": status", old_record["status"], "->", new_record["status"])
+            continue
+        comparison[case_str] = {"time_ratio": new_record["total_time"] / old_record["total_time"]}
+        if old_record["peak_memory"] and new_record["peak_memory"]:
+            comparison[case_str]["memory_ratio"] = new_record["peak_memory"] / old_record["peak_memory"]
+        print(case_str, ":", comparison[case_str])
+    return comparison
+
+if __name__ == "__main__":
+    # python -m pynoa.benchmark [--models ...] [--out results.json] [--timeout 600] [--seed 0]
+    # python -m pynoa.benchmark --compare old_results.json new_results.json
+    parser = argparse.ArgumentParser(description="PyNOA benchmark suite of the notebook models")
+    parser.add_argument("--models", nargs="+", default=None, choices=list(models))
+    for NOA_opt, values in benchmark_grid.items():
+        parser.add_argument("--" + NOA_opt, nargs="+", default=values, type=type(values[0]))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--out", default="")
+    parser.add_argument("--compare", nargs=2, default=None, metavar=("OLD", "NEW"))
+    args = parser.parse_args()
+    if args.compare != None:
+        benchmark_compare(*args.compare)
+    else:
+        grid = {NOA_opt: getattr(args, NOA_opt) for NOA_opt in benchmark_grid}
+        benchmark(args.models, grid, args.seed, args.timeout, args.out)
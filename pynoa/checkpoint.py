@@ -0,0 +1,95 @@
+import sympy as sp
+import numpy as np
+import json
+import os
+import zlib
+
+# Namespace of the sympy classes to evaluate srepr strings
+sympy_namespace = {}
+exec("from sympy import *", sympy_namespace)
+
+def expr_encode(expr, expr_table):
+    # Index of a sympy expression in the expression table {"nodes": [...], "node_index": {node: idx}, "id_index": {id(expr): idx}}.
+    # Each distinct subexpression is stored once as [class name, argument indices], so the subtrees shared by
+    # the Lie derivatives & their gradients are not repeated like in a plain srepr string.
+    # Atoms & classes that are not in the sympy namespace (e.g. undefined functions) are stored by srepr.
+    # Nodes are identified by their srepr or class & argument indices instead of ==, which equates e.g. 2.0 & 2 in older sympy versions.
+    idx_node = expr_table["id_index"].get(id(expr))
+    if idx_node != None:
+        return idx_node
+    if expr.is_Atom or sympy_namespace.get(type(expr).__name__) is not type(expr):
+        node = sp.srepr(expr)
+    else:
+        node = (type(expr).__name__, tuple(expr_encode(arg, expr_table) for arg in expr.args))
+    idx_node = expr_table["node_index"].get(node)
+    if idx_node == None:
+        expr_table["nodes"].append(node)
+        idx_node = expr_table["node_index"][node] = len(expr_table["nodes"]) - 1
+    expr_table["id_index"][id(expr)] = idx_node
+    expr_table["exprs"].append(expr)            # keeps expr alive, so its id is not reused during the encoding
+    return idx_node
+
+def expr_table_decode(nodes):
+    # Expressions of the nodes of an expression table. The arguments of a node always precede it in the table
+    exprs = []
+    for node in nodes:
+        if isinstance(node, str):
+            exprs.append(eval(node, sympy_namespace))
+        else:
+            exprs.append(sympy_namespace[node[0]](*[exprs[idx_arg] for idx_arg in node[1]]))
+    return exprs
+
+def state_encode(value, expr_table):
+    # Encode a checkpoint value into json. Sympy expressions & matrices are stored as indices of the expression table,
+    # which is built from srepr & sympy class names and is stable between sympy versions unlike pickle.
+    if isinstance(value, sp.MatrixBase):
+        return {"matrix": [value.rows, value.cols, [expr_encode(entry, expr_table) for entry in value]]}
+    if isinstance(value, sp.Basic):
+        return {"expr": expr_encode(value, expr_table)}
+    if isinstance(value, dict):
+        return {"dict": [[state_encode(key, expr_table), state_encode(item, expr_table)] for key, item in value.items()]}
+    if isinstance(value, (list, tuple)):
+        return {"list": [state_encode(item, expr_table) for item in value]}
+    if isinstance(value, np.ndarray):
+        return {"array": [list(value.shape), value.ravel().tolist()]}
+    if hasattr(value, "item"):                  # numpy scalars
+        return value.item()
+    return value
+
+def state_decode(value, exprs):
+    # Inverse of state_encode
+    if isinstance(value, dict):
+        if "matrix" in value:
+            rows, cols, idx_entries = value["matrix"]
+            return sp.Matrix(rows, cols, [exprs[idx_entry] for idx_entry in idx_entries])
+        if "expr" in value:
+            return exprs[value["expr"]]
+        if "array" in value:
+            shape, entries = value["array"]
+            return np.array(entries, dtype=float).reshape(shape)
+        if "srepr" in value:                    # checkpoints written before the expression table
+            return eval(value["srepr"], sympy_namespace)
+        if "dict" in value:
+            return {state_decode(key, exprs): state_decode(item, exprs) for key, item in value["dict"]}
+        if "list" in value:
+            return [state_decode(item, exprs) for item in value["list"]]
+    return value
+
+def checkpoint_write(file_name, state):
+    # Write a dictionary of checkpoint values as zlib-compressed json.
+    # The file is written to a temporary file first, so an interrupted write does not corrupt an existing checkpoint.
+    expr_table = {"nodes": [], "node_index": {}, "id_index": {}, "exprs": []}
+    state_encoded = {key: state_encode(item, expr_table) for key, item in state.items()}
+    checkpoint_bytes = zlib.compress(json.dumps({"exprs": expr_table["nodes"], "state": state_encoded}).encode())
+    with open(file_name + ".tmp", "wb") as file:
+        file.write(checkpoint_bytes)
+    os.replace(file_name + ".tmp", file_name)
+
+def checkpoint_read(file_name):
+    # Inverse of checkpoint_write
+    with open(file_name, "rb") as file:
+        checkpoint = json.loads(zlib.decompress(file.read()).decode())
+    if "exprs" not in checkpoint:               # checkpoints written before the expression table
+        return {key: state_decode(item, []) for key, item in checkpoint.items()}
+    exprs = expr_table_decode(checkpoint["exprs"])
+    return {key: state_decode(item, exprs) for key, item in checkpoint["state"].items()}
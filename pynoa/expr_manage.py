@@ -0,0 +1,22 @@
+import sympy as sp
+
+# Expression management policies of the Lie derivatives between orders
+expr_simp_policies = {
+    "none":     lambda expr_mat: expr_mat,
+    "expand":   lambda expr_mat: expr_mat.applyfunc(sp.expand),
+    "cancel":   lambda expr_mat: expr_mat.applyfunc(sp.cancel),
+    "trigsimp": lambda expr_mat: expr_mat.applyfunc(sp.trigsimp),
+}
+
+def expr_manage(expr_mat, simp_opt="none", size_budget=0):
+    # Apply the expression management policy simp_opt to a symbolic matrix
+    # Input args:
+    # simp_opt    = none, expand, cancel or trigsimp
+    # size_budget = the policy is only applied when count_ops(expr_mat) exceeds size_budget, 0 to always apply it
+    if simp_opt not in expr_simp_policies:
+        raise ValueError("Unknown expression management policy: " + str(simp_opt))
+    if simp_opt == "none":
+        return expr_mat
+    if size_budget > 0 and sp.count_ops(list(expr_mat)) <= size_budget:
+        return expr_mat
+    return expr_simp_policies[simp_opt](expr_mat)
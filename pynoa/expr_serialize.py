@@ -0,0 +1,11 @@
+import pickle
+import zlib
+
+def expr_dumps(expr):
+    # Compact serialization of a sympy expression or matrix as zlib-compressed pickle.
+    # Pickle keeps the shared structure of the expression tree, which makes it much smaller & faster than srepr on large Lie derivatives.
+    return zlib.compress(pickle.dumps(expr, protocol=pickle.HIGHEST_PROTOCOL))
+
+def expr_loads(expr_bytes):
+    # Inverse of expr_dumps
+    return pickle.loads(zlib.decompress(expr_bytes))
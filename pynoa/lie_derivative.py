@@ -0,0 +1,65 @@
+import sympy as sp
+from .expr_serialize import expr_dumps, expr_loads
+from .expr_manage import expr_manage
+from .symengine_backend import lie_derivative_symengine, to_symengine, to_sympy
+
+def is_zero_mat(mat):
+    # Structural zero test of a matrix without allocating a zero matrix to compare with
+    return all(entry == 0 for entry in mat)
+
+def sparse_mat_vec(mat, vec):
+    # Matrix-vector product that only multiplies the entries where both factors are nonzero
+    vec_nonzero = [(idx, vec_entry) for idx, vec_entry in enumerate(vec) if vec_entry != 0]
+    return sp.Matrix(mat.rows, 1, [sp.Add(*[mat[idx_row, idx]*vec_entry for idx, vec_entry in vec_nonzero if mat[idx_row, idx] != 0])
+                                   for idx_row in range(mat.rows)])
+
+def sparse_jacobian(expr_mat, x):
+    # Jacobian of a vector wrt x that only differentiates each entry wrt the variables it depends on
+    jac = sp.zeros(len(expr_mat), len(x))
+    for idx_row, expr in enumerate(expr_mat):
+        if expr == 0:
+            continue
+        expr_symbols = expr.free_symbols
+        for idx_x, x_i in enumerate(x):
+            if x_i in expr_symbols or (not x_i.is_Symbol and expr.has(x_i)):
+                jac[idx_row, idx_x] = expr.diff(x_i)
+    return jac
+
+def lie_derivative(dLfh_dx_prev, f_i, x, simp_opt="none", size_budget=0):
+    # Lie derivative of a previous order Lie derivative along the vector field f_i & its gradient wrt x.
+    # The expression management policy simp_opt is applied to the Lie derivative before its gradient is taken.
+    # Zero entries of the gradient & vector field are skipped in the product and the Jacobian.
+    # The SymEngine backend is lie_derivative_symengine.
+    Lfh = expr_manage(sparse_mat_vec(dLfh_dx_prev, f_i), simp_opt, size_budget)
+    return Lfh, sparse_jacobian(Lfh, x)
+
+# State vector, vector fields, expression management policy & backend of the worker processes, sent once when the process pool starts.
+# With the symengine backend, x & f are converted to SymEngine once per worker.
+worker_x = None
+worker_f = []
+worker_simp_opt = "none"
+worker_size_budget = 0
+worker_backend = "sympy"
+
+def lie_derivative_worker_init(x_serialized, f_serialized, simp_opt="none", size_budget=0, backend="sympy"):
+    global worker_x, worker_f, worker_simp_opt, worker_size_budget, worker_backend
+    worker_x = expr_loads(x_serialized)
+    worker_f = [expr_loads(f_i_serialized) for f_i_serialized in f_serialized]
+    worker_simp_opt = simp_opt
+    worker_size_budget = size_budget
+    worker_backend = backend
+    if backend == "symengine":
+        worker_x = to_symengine(worker_x)
+        worker_f = [to_symengine(f_i) for f_i in worker_f]
+
+def lie_derivative_worker(args):
+    # Lie derivative in a worker process. Expressions are exchanged in serialized form.
+    # args = (serialized gradient of the previous order Lie derivative, vector field index)
+    dLfh_dx_prev_serialized, idx_vector_field = args
+    if worker_backend == "symengine":
+        Lfh_se, dLfh_dx_se = lie_derivative_symengine(to_symengine(expr_loads(dLfh_dx_prev_serialized)), worker_f[idx_vector_field], worker_x,
+                                                      worker_simp_opt, worker_size_budget)
+        return expr_dumps(to_sympy(Lfh_se)), expr_dumps(to_sympy(dLfh_dx_se))
+    Lfh, dLfh_dx = lie_derivative(expr_loads(dLfh_dx_prev_serialized), worker_f[idx_vector_field], worker_x,
+                                  worker_simp_opt, worker_size_budget)
+    return expr_dumps(Lfh), expr_dumps(dLfh_dx)
@@ -0,0 +1,150 @@
+import sympy as sp
+
+from .NOA import NOA
+from .quat_sympy import quat2rotm_sym, quatprod_sym
+
+# Models of the example Jupyter notebooks. Each function returns a NOA object
+# with the state vector, vector fields, measurement model & ORC options of the notebook.
+
+def martinelli_2010_simple_localization():
+    # martinelli_2010_simple_localization_mobileRobot2D.ipynb
+    D, phi_R, theta_R = sp.symbols("D, phi_R, theta_R")
+    mobile_robot = NOA("mobile_robot_symbolic")
+    mobile_robot.x = sp.Matrix([D, phi_R, theta_R])
+    f0 = sp.zeros(3,1)
+    f1 = sp.Matrix([[sp.cos(theta_R-phi_R), sp.sin(theta_R-phi_R)/D, 0]]).T
+    f2 = sp.Matrix([[0,0,1]]).T
+    mobile_robot.f = [f0, f1, f2]
+    mobile_robot.h = sp.Matrix([sp.pi - theta_R + phi_R])
+    mobile_robot.params_config_subs = sp.Matrix([mobile_robot.x])
+    return mobile_robot
+
+def martinelli_2010_odometry_calibration_noncircular():
+    # martinelli_2010_odometry_calibration_mobileRobot2D.ipynb, non-circular trajectory
+    mu, gamma = sp.symbols(r"\mu, \gamma")
+    phi, psi, eta, delta, xi = sp.symbols(r"\phi, \psi, \eta, \delta, xi")
+    noncircular = NOA("noncircular_trajectory_mobile_robot")
+    noncircular.x = sp.Matrix([mu, gamma, phi, psi, eta, delta, xi])
+    f0 = sp.zeros(7,1)
+    f1 = sp.Matrix([[-mu**2*eta*sp.cos(gamma-phi), xi-mu*eta*sp.sin(gamma-phi), 0, 0 ,0 ,0, 0]]).T
+    f2 = sp.Matrix([[-mu**2*eta*delta*sp.cos(gamma-phi), -xi*delta-mu*eta*delta*sp.sin(gamma-phi), 0, 0, 0, 0, 0]]).T
+    noncircular.f = [f0, f1, f2]
+    noncircular.h = sp.Matrix([-sp.atan2(sp.sin(gamma),(mu+sp.cos(gamma))) - psi])
+    noncircular.LD_order = 2
+    noncircular.combn_permn_opt = "permutation"
+    noncircular.rank_calc_opt = "numeric"
+    noncircular.params_config_subs = sp.Matrix([noncircular.x])
+    return noncircular
+
+def martinelli_2010_odometry_calibration_circular():
+    # martinelli_2010_odometry_calibration_mobileRobot2D.ipynb, circular trajectory
+    mu, gamma, phi = sp.symbols(r"\mu, \gamma, \phi")
+    eta_q, xi_q = sp.symbols(r"\eta_q, xi_q")
+    circular = NOA("circular_trajectory_mobile_robot")
+    circular.x = sp.Matrix([mu, gamma, eta_q, xi_q, phi])
+    f0_circ = sp.zeros(5,1)
+    f1_circ = sp.Matrix([[-mu**2*eta_q*sp.cos(gamma-phi), xi_q-mu*eta_q*sp.sin(gamma-phi), 0, 0 ,0]]).T
+    circular.f = [f0_circ, f1_circ]
+    circular.h = sp.Matrix([sp.sin(gamma)/(mu+sp.cos(gamma))])
+    circular.LD_order = 2
+    circular.combn_permn_opt = "combination"
+    circular.rank_calc_opt = "numeric"
+    circular.params_config_subs = sp.Matrix([circular.x])
+    return circular
+
+def ko_2019_quadrotor():
+    # State vectors, control inputs, vector fields & measurement models of ko_2019_quadrotor_inertialNavigation.ipynb
+    r_W_WB_x, r_W_WB_y, r_W_WB_z = sp.symbols("{_W{r}_{WB_x}}, {_W{r}_{WB_y}}, {_W{r}_{WB_z}}")
+    r_W_WB = sp.Matrix([[r_W_WB_x , r_W_WB_y , r_W_WB_z]]).T
+    v_W_WB_x , v_W_WB_y , v_W_WB_z = sp.symbols("{_W{v}_{WB_x}}, {_W{v}_{WB_y}}, {_W{v}_{WB_z}}")
+    v_W_WB = sp.Matrix([[v_W_WB_x , v_W_WB_y , v_W_WB_z]]).T
+    q_WB_w, q_WB_x, q_WB_y, q_WB_z = sp.symbols("q_{WB_w}, q_{WB_x}, q_{WB_y}, q_{WB_z}")
+    q_WB = sp.Matrix([[q_WB_w, q_WB_x, q_WB_y, q_WB_z]]).T
+    R_WB = quat2rotm_sym(q_WB)
+    omega_B_WB_x, omega_B_WB_y, omega_B_WB_z = sp.symbols(r"{_B{\omega}_{WB_x}}, {_B{\omega}_{WB_y}}, {_B{\omega}_{WB_z}}")
+    omega_B_WB = sp.Matrix([[omega_B_WB_x, omega_B_WB_y, omega_B_WB_z]]).T
+    x_T = sp.Matrix([r_W_WB, v_W_WB, q_WB, omega_B_WB])             # trajectory state vector
+
+    m, i_M_xx, i_M_yy, i_M_zz = sp.symbols("m, {_M{i}_{xx}}, {_M{i}_{yy}}, {_M{i}_{zz}}")
+    i_M = sp.Matrix([[i_M_xx, i_M_yy, i_M_zz]]).T
+    I_M = sp.diag(i_M_xx, i_M_yy, i_M_zz)
+    g_W_x, g_W_y, g_W_z = sp.symbols("{_W{g}_x}, {_W{g}_y}, {_W{g}_z}")
+    g_W = sp.Matrix([[g_W_x, g_W_y, g_W_z]]).T
+    x_I = sp.Matrix([m, i_M, g_W])                                  # inertial parameters state vector
+
+    lambda_l = sp.symbols(r"{\lambda}_l")
+    d_12, d_23, d_34, d_14 = sp.symbols("d_{12}, d_{23}, d_{34}, d_{14}")
+    k_f_1, k_f_2, k_f_3, k_f_4 = sp.symbols("k_{f_1} k_{f_2} k_{f_3} k_{f_4}")
+    k_m_1, k_m_2, k_m_3, k_m_4 = sp.symbols("k_{m_1} k_{m_2} k_{m_3} k_{m_4}")
+    x_G = sp.Matrix([[lambda_l, d_12, d_23, d_34, d_14,
+                      k_f_1, k_f_2, k_f_3, k_f_4,
+                      k_m_1, k_m_2, k_m_3, k_m_4
+                    ]]).T                                           # rotor parameters state vector
+    r_B_BR = [sp.Matrix([[d_12, -d_14, 0]]).T, sp.Matrix([[d_12, d_23, 0]]).T,
+              sp.Matrix([[-d_34, d_23, 0]]).T, sp.Matrix([[-d_34, -d_14, 0]]).T]
+
+    omega_1, omega_2, omega_3, omega_4 = sp.symbols(r"{\omega}_1, {\omega}_2, {\omega}_3, {\omega}_4")
+    u = sp.Matrix([[omega_1, omega_2, omega_3, omega_4]]).T
+
+    P_xy = sp.diag(1,1,0)
+    e_z = sp.Matrix([[0,0,1]]).T
+    f0 = sp.Matrix([v_W_WB,
+                    g_W,
+                    1/2*quatprod_sym(q_WB, sp.Matrix([0, omega_B_WB])),
+                    -I_M.inv()*(omega_B_WB.cross(I_M*omega_B_WB))])
+    f = [f0]
+    for k_f_i, k_m_i, r_B_BR_i in zip([k_f_1, k_f_2, k_f_3, k_f_4], [k_m_1, k_m_2, k_m_3, k_m_4], r_B_BR):
+        k_v_dot_i = 1/m*R_WB*k_f_i*e_z - lambda_l/m*R_WB*P_xy*R_WB.T*v_W_WB
+        k_omega_dot_i = I_M.inv()*(k_m_i*e_z + r_B_BR_i.cross(k_f_i*e_z))
+        f.append(sp.Matrix([sp.zeros(3,1), k_v_dot_i, sp.zeros(4,1), k_omega_dot_i]))
+
+    k_l = lambda_l*(omega_1+omega_2+omega_3+omega_4)
+    V = sp.diag(-k_l, -k_l, 0)
+    F_B_thrust = (k_f_1*omega_1**2 + k_f_2*omega_2**2 + k_f_3*omega_3**2 + k_f_4*omega_4**2)*e_z
+    F_B_drag = V*R_WB.T*v_W_WB
+    h_IMU = sp.Matrix([1/m*(F_B_thrust + F_B_drag), omega_B_WB])
+    h_baro = r_W_WB_z
+    h_GNSS = sp.Matrix([r_W_WB_x, r_W_WB_y])
+    return {"x_T": x_T, "x_I": x_I, "x_G": x_G, "u": u, "f": f, "h_IMU": h_IMU, "h_baro": h_baro, "h_GNSS": h_GNSS}
+
+def ko_2019_quadrotor_NOA(name, h, parameter_estimation):
+    # Quadrotor NOA object with the ORC options of ko_2019_quadrotor_inertialNavigation.ipynb.
+    # With parameter_estimation, the inertial & rotor parameters are treated as state variables.
+    quadrotor = ko_2019_quadrotor()
+    quadrotor_NOA = NOA(name)
+    if parameter_estimation:
+        quadrotor_NOA.x = sp.Matrix([quadrotor["x_T"], quadrotor["x_I"], quadrotor["x_G"]])
+        quadrotor_NOA.f = [sp.Matrix([f_i, sp.zeros(quadrotor_NOA.x.rows - f_i.rows, 1)]) for f_i in quadrotor["f"]]
+    else:
+        quadrotor_NOA.x = quadrotor["x_T"]
+        quadrotor_NOA.f = quadrotor["f"]
+    quadrotor_NOA.h = sp.Matrix([quadrotor[h_i] for h_i in h])
+    quadrotor_NOA.LD_order = 2
+    quadrotor_NOA.rank_calc_opt = "numeric"
+    quadrotor_NOA.combn_permn_opt = "drift2ndOrder"
+    quadrotor_NOA.params_config_subs = sp.Matrix([quadrotor["x_T"], quadrotor["x_G"], quadrotor["x_I"], quadrotor["u"]])
+    quadrotor_NOA.null_calc_opt = "numeric"
+    return quadrotor_NOA
+
+def ko_2019_imu_baro_IN():
+    return ko_2019_quadrotor_NOA("IMU_BarometricAltimeter_InertialNavigation", ["h_IMU", "h_baro"], False)
+
+def ko_2019_imu_gnss_baro_PE():
+    return ko_2019_quadrotor_NOA("IMU_GNSS_BarometricAltimeter_ParameterEstimation", ["h_IMU", "h_GNSS", "h_baro"], True)
+
+def ko_2019_baro_GNSS_PE():
+    return ko_2019_quadrotor_NOA("BarometricAltimeter_GNSS_ParameterEstimation", ["h_baro", "h_GNSS"], True)
+
+def ko_2019_imu_PE():
+    return ko_2019_quadrotor_NOA("IMU_ParameterEstimation", ["h_IMU"], True)
+
+# Registry of the notebook models {model name: NOA object constructor}
+models = {
+    "martinelli_2010_simple_localization": martinelli_2010_simple_localization,
+    "martinelli_2010_odometry_calibration_noncircular": martinelli_2010_odometry_calibration_noncircular,
+    "martinelli_2010_odometry_calibration_circular": martinelli_2010_odometry_calibration_circular,
+    "ko_2019_imu_baro_IN": ko_2019_imu_baro_IN,
+    "ko_2019_imu_gnss_baro_PE": ko_2019_imu_gnss_baro_PE,
+    "ko_2019_baro_GNSS_PE": ko_2019_baro_GNSS_PE,
+    "ko_2019_imu_PE": ko_2019_imu_PE,
+}
@@ -0,0 +1,137 @@
+import sympy as sp
+from sympy.polys.matrices import DomainMatrix
+
+def trig_to_rational(obsv_mat):
+    # Substitute trigonometric functions with rational functions of generator symbols
+    # using the tangent half-angle substitution T = tan(a/2):
+    # sin(a) = 2T/(1+T^2), cos(a) = (1-T^2)/(1+T^2), tan(a) = 2T/(1-T^2)
+    # The substitution is exact, so the identity sin(a)^2 + cos(a)^2 = 1 is preserved.
+    # Trigonometric arguments sharing a state variable, e.g. sin(gamma - phi) & sin(gamma),
+    # are first expanded into functions of the individual arguments.
+    #
+    # Output args:
+    # obsv_mat_rational = observability matrix in rational functions of the states & generators
+    # generators_subs   = back substitution {T: tan(a/2)} of the generator symbols
+    trig_args = list({trig.args[0] for trig in obsv_mat.atoms(sp.sin, sp.cos, sp.tan)})
+    trig_args_symbols = [trig_arg.free_symbols for trig_arg in trig_args]
+    for idx_arg, arg_symbols in enumerate(trig_args_symbols):
+        if any(arg_symbols & other_arg_symbols for other_arg_symbols in trig_args_symbols[idx_arg+1:]):
+            obsv_mat = obsv_mat.applyfunc(sp.expand_trig)
+            trig_args = list({trig.args[0] for trig in obsv_mat.atoms(sp.sin, sp.cos, sp.tan)})
+            break
+
+    trig_subs = {}
+    generators_subs = {}
+    for trig_arg in sorted(trig_args, key=str):
+        T = sp.Dummy("T")
+        trig_subs[sp.sin(trig_arg)] = 2*T/(1+T**2)
+        trig_subs[sp.cos(trig_arg)] = (1-T**2)/(1+T**2)
+        trig_subs[sp.tan(trig_arg)] = 2*T/(1-T**2)
+        generators_subs[T] = sp.tan(trig_arg/2)
+    return obsv_mat.xreplace(trig_subs), generators_subs
+
+def expr_generators(expr, generators, memo):
+    # Collect the generators of the rational function field of an expression:
+    # symbols and all non-rational atoms such as atan2(.), sqrt(.) or pi
+    if expr in memo:
+        return
+    memo.add(expr)
+    if expr.is_Rational:
+        return
+    if expr.is_Add or expr.is_Mul:
+        for arg in expr.args:
+            expr_generators(arg, generators, memo)
+    elif expr.is_Pow and expr.exp.is_Integer:
+        expr_generators(expr.base, generators, memo)
+    else:
+        generators.add(expr)
+
+def expr_to_field(expr, field_domain, generators_map, memo):
+    # Convert an expression tree bottom-up into an element of the rational function field.
+    # Every intermediate result is a reduced fraction of polynomials and shared subexpressions are converted once,
+    # which avoids expanding the whole expression like sympy.cancel() does.
+    if expr in memo:
+        return memo[expr]
+    if expr.is_Rational:
+        expr_field = field_domain.from_sympy(expr)
+    elif expr.is_Add:
+        expr_field = field_domain.zero
+        for arg in expr.args:
+            expr_field += expr_to_field(arg, field_domain, generators_map, memo)
+    elif expr.is_Mul:
+        expr_field = field_domain.one
+        for arg in expr.args:
+            expr_field *= expr_to_field(arg, field_domain, generators_map, memo)
+    elif expr.is_Pow and expr.exp.is_Integer:
+        expr_field = expr_to_field(expr.base, field_domain, generators_map, memo)**int(expr.exp)
+    else:
+        expr_field = generators_map[expr]
+    memo[expr] = expr_field
+    return expr_field
+
+def generators_independent(generators, generators_subs):
+    # The rational function field treats every generator as algebraically independent.
+    # Non-symbol generators such as sqrt(x), exp(2*x) or the half-angle tangents may be related to the other generators
+    # through their common symbols, e.g. sqrt(x)**2 = x or exp(2*x) = exp(x)**2, so they must not share symbols with any other generator.
+    # The check is conservative: a few independent pairs like x & tan(x/2) are also rejected.
+    generators_symbols = [generators_subs[gen].free_symbols if gen in generators_subs else gen.free_symbols for gen in generators]
+    for idx_gen, gen in enumerate(generators):
+        if gen.is_Symbol and gen not in generators_subs:
+            continue
+        if any(generators_symbols[idx_gen] & other_symbols for idx_other, other_symbols in enumerate(generators_symbols) if idx_other != idx_gen):
+            return False
+    return True
+
+def obsv_mat_to_domain(obsv_mat):
+    # Convert the observability matrix into a DomainMatrix over a polynomial ring.
+    # Each row is multiplied by the least common multiple of its denominators, which does not change the rank or nullspace.
+    # Float coefficients are converted to rationals, so that e.g. 0.5*x and x are not independent generators.
+    # Returns (None, generators_subs) if the generators are not algebraically independent.
+    obsv_mat = obsv_mat.xreplace({float_atom: sp.nsimplify(float_atom, rational=True) for float_atom in obsv_mat.atoms(sp.Float)})
+    obsv_mat_rational, generators_subs = trig_to_rational(obsv_mat)
+    generators = set()
+    generators_memo = set()
+    for entry in obsv_mat_rational:
+        expr_generators(entry, generators, generators_memo)
+    generators = sorted(generators, key=str)
+    if not generators_independent(generators, generators_subs):
+        return None, generators_subs
+    field_domain = sp.QQ.frac_field(*generators) if generators else sp.QQ
+    generators_map = dict(zip(generators, field_domain.gens)) if generators else {}
+    field_memo = {}
+    obsv_mat_list = [[expr_to_field(obsv_mat_rational[idx_row, idx_col], field_domain, generators_map, field_memo)
+                      for idx_col in range(obsv_mat.cols)] for idx_row in range(obsv_mat.rows)]
+    obsv_mat_dm = DomainMatrix(obsv_mat_list, obsv_mat.shape, field_domain)
+    if generators:
+        _, obsv_mat_dm = obsv_mat_dm.clear_denoms_rowwise(convert=True)
+    return obsv_mat_dm, generators_subs
+
+def domain_rank(obsv_mat):
+    # Rank of a symbolic observability matrix by fraction-free (Bareiss) row reduction.
+    # Falls back to sympy Matrix.rank() if the matrix has no rational function field representation.
+    if obsv_mat.rows == 0 or obsv_mat.cols == 0:
+        return 0
+    obsv_mat_dm, _ = obsv_mat_to_domain(obsv_mat)
+    if obsv_mat_dm == None:
+        return obsv_mat.rank()
+    _, _, pivots = obsv_mat_dm.rref_den(method="FF")
+    return len(pivots)
+
+def domain_nullspace(obsv_mat):
+    # Nullspace of a symbolic observability matrix by fraction-free (Bareiss) row reduction.
+    # Like sympy Matrix.nullspace(), each basis vector is normalized so that its free variable equals 1.
+    # Falls back to sympy Matrix.nullspace() if the matrix has no rational function field representation.
+    obsv_mat_dm, generators_subs = obsv_mat_to_domain(obsv_mat)
+    if obsv_mat_dm == None:
+        return obsv_mat.nullspace()
+    _, _, pivots = obsv_mat_dm.rref_den(method="FF")
+    idx_free = [idx_col for idx_col in range(obsv_mat.cols) if idx_col not in pivots]
+    null_dm = obsv_mat_dm.nullspace()
+    nullspace = []
+    for idx_ws in range(null_dm.shape[0]):
+        ws = null_dm[idx_ws, :].to_Matrix().T
+        ws = (ws / ws[idx_free[idx_ws]]).applyfunc(sp.factor)
+        if generators_subs:
+            ws = ws.xreplace(generators_subs).applyfunc(sp.fu)
+        nullspace.append(ws)
+    return nullspace
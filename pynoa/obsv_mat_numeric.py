@@ -0,0 +1,146 @@
+import sympy as sp
+import numpy as np
+
+def obsv_mat_lambdify(obsv_mat, symbols):
+    # Compile a symbolic observability matrix into a vectorized numpy function
+    # Input args:
+    # obsv_mat = symbolic observability matrix (rows x cols)
+    # symbols  = ordered list of the free symbols of obsv_mat
+    #
+    # Output args:
+    # obsv_mat_func(points) = observability matrices evaluated at points (N x len(symbols)),
+    #                         returned as an array (N x rows x cols)
+    rows, cols = obsv_mat.shape
+    entries_func = sp.lambdify(list(symbols), list(obsv_mat), modules="numpy", cse=True)
+
+    def obsv_mat_func(points):
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        entries = entries_func(*points.T)
+        obsv_mat_batch = np.empty((points.shape[0], rows*cols))
+        for idx_entry, entry in enumerate(entries):
+            obsv_mat_batch[:, idx_entry] = entry    # constant entries are broadcast to all points
+        return obsv_mat_batch.reshape(points.shape[0], rows, cols)
+
+    return obsv_mat_func
+
+def obsv_mat_sample_points(symbols, num_samples, fixed_params_dict=None, sample_range=(0.5, 2.0), rng=None):
+    # Uniform random sample points of the symbols (num_samples x len(symbols)).
+    # Symbols in fixed_params_dict keep their given value in every sample.
+    if fixed_params_dict is None:
+        fixed_params_dict = {}
+    if rng is None:
+        rng = np.random.default_rng()
+    points = rng.uniform(sample_range[0], sample_range[1], size=(num_samples, len(symbols)))
+    for idx_symbol, symbol in enumerate(symbols):
+        if symbol in fixed_params_dict:
+            points[:, idx_symbol] = float(fixed_params_dict[symbol])
+    return points
+
+def svd_rank(obsv_mat_batch, tol=1e-9):
+    # Numerical rank of each matrix in a batch (N x rows x cols) by singular value decomposition
+    # Input args:
+    # tol = singular values below tol * largest singular value are treated as zero
+    #
+    # Output args:
+    # ranks           = rank of each matrix (N)
+    # singular_values = singular values of each matrix in descending order (N x min(rows, cols))
+    singular_values = np.linalg.svd(obsv_mat_batch, compute_uv=False)
+    ranks = np.sum(singular_values > tol*singular_values[:, :1], axis=1)
+    return ranks, singular_values
+
+def sv_gap(singular_values, rank, tol=1e-9):
+    # Gap between the last nonzero and the first zero singular value, sigma_rank / sigma_(rank+1).
+    # A large gap means a confident rank estimate. At full column or row rank there is no zero singular value,
+    # so the gap is the margin of sigma_rank above the rank threshold, sigma_rank / (tol * sigma_1).
+    if rank == 0:
+        return 0.0
+    if rank >= singular_values.shape[-1]:
+        return singular_values[rank-1] / (tol*singular_values[0])
+    with np.errstate(divide="ignore"):
+        return singular_values[rank-1] / singular_values[rank]
+
+def obsv_mat_map(obsv_mat_func, points_batches, tol=1e-9):
+    # Rank, smallest singular value & condition number of the observability matrix at batches of points
+    # Input args:
+    # obsv_mat_func  = compiled observability matrix from obsv_mat_lambdify
+    # points_batches = iterable of point arrays (N_batch x len(symbols))
+    #
+    # Output args:
+    # ranks    = rank at each point, -1 where the observability matrix is not finite
+    # sv_min   = smallest singular value at each point, nan where the observability matrix is not finite
+    # cond_num = condition number sigma_max / sigma_min at each point, nan where the observability matrix is not finite
+    ranks_list, sv_min_list, cond_num_list = [], [], []
+    for points in points_batches:
+        obsv_mat_batch = obsv_mat_func(points)
+        valid_points = np.all(np.isfinite(obsv_mat_batch), axis=(1,2))
+        ranks = np.full(obsv_mat_batch.shape[0], -1)
+        sv_min = np.full(obsv_mat_batch.shape[0], np.nan)
+        cond_num = np.full(obsv_mat_batch.shape[0], np.nan)
+        if np.any(valid_points):
+            ranks[valid_points], singular_values = svd_rank(obsv_mat_batch[valid_points], tol)
+            sv_min[valid_points] = singular_values[:, -1]
+            with np.errstate(divide="ignore"):
+                cond_num[valid_points] = singular_values[:, 0] / singular_values[:, -1]
+        ranks_list.append(ranks)
+        sv_min_list.append(sv_min)
+        cond_num_list.append(cond_num)
+    if len(ranks_list) == 0:
+        return np.array([], dtype=int), np.array([]), np.array([])
+    return np.concatenate(ranks_list), np.concatenate(sv_min_list), np.concatenate(cond_num_list)
+
+def svd_nullspace(obsv_mat_batch, rank):
+    # Orthonormal nullspace basis of each matrix in a batch (N x rows x cols) of the given rank.
+    # The basis is spanned by the right singular vectors of the zero singular values, returned as (N x cols x (cols-rank))
+    _, _, vh = np.linalg.svd(obsv_mat_batch)
+    return np.conj(vh[:, rank:, :]).transpose(0, 2, 1)
+
+def null_state_classify(null_bases, tol=1e-6):
+    # Classify the states from the sparsity of orthonormal nullspace bases (N x states x dim) at N sample points.
+    # The norm of row i of an orthonormal basis is the length of the projection of the i-th standard basis vector on the nullspace,
+    # so the classification does not depend on the choice of basis:
+    # norm 0 = observable state, norm 1 = unobservable state (a continuous symmetry along the state alone), otherwise jointly observable.
+    # A state is only observable or unobservable if it is classified so at all sample points.
+    #
+    # Output args:
+    # observable_mask, unobservable_mask, joint_mask = boolean arrays (states)
+    row_norms = np.linalg.norm(null_bases, axis=2)
+    observable_mask = np.all(row_norms < tol, axis=0)
+    unobservable_mask = np.all(np.abs(row_norms - 1) < tol, axis=0)
+    joint_mask = ~(observable_mask | unobservable_mask)
+    return observable_mask, unobservable_mask, joint_mask
+
+def rank_probe_update(bases, rows, tol=1e-9):
+    # Incremental rank of the observability matrix at N probe points.
+    # Each probe point keeps an orthonormal basis of the rows evaluated so far, and a new row is reduced against it
+    # by Gram-Schmidt with reorthogonalization. The row increases the rank if its residual exceeds tol * its norm.
+    # Input args:
+    # bases = list of orthonormal bases (rank x cols) at each probe point, None where the rows are not finite
+    # rows  = a row of the observability matrix evaluated at the probe points (N x cols)
+    #
+    # Output args:
+    # rank_increased = True if the rank increased at any valid probe point. bases are updated in place.
+    rank_increased = False
+    for idx_point, row in enumerate(rows):
+        if bases[idx_point] is None:
+            continue
+        if not np.all(np.isfinite(row)):
+            bases[idx_point] = None             # singular probe point, excluded from the rank
+            continue
+        row_norm = np.linalg.norm(row)
+        if row_norm == 0:
+            continue
+        residual = row
+        for _ in range(2):
+            residual = residual - bases[idx_point].T @ (bases[idx_point] @ residual)
+        residual_norm = np.linalg.norm(residual)
+        if residual_norm > tol*row_norm:
+            bases[idx_point] = np.vstack([bases[idx_point], residual/residual_norm])
+            rank_increased = True
+    return rank_increased
+
+def rank_probe(bases):
+    # Rank of the observability matrix from the probe point bases of rank_probe_update, the maximum over the valid points
+    valid_bases = [basis for basis in bases if basis is not None]
+    if len(valid_bases) == 0:
+        raise ValueError("Observability matrix is not finite at any of the probe points")
+    return max(basis.shape[0] for basis in valid_bases)
@@ -0,0 +1,4 @@
+from .quat2rotm_np import *
+from .quatprod_np import *
+from .quatsub_np import *
+from .quat_random_np import *
\ No newline at end of file
@@ -0,0 +1,13 @@
+import numpy as np
+def quat_random_np(num_samples, rng=None):
+    # Uniformly distributed random attitudes as unit quaternions (num_samples x 4), each row [qw, qx, qy, qz]
+    # Reference: Uniform Random Rotations (Shoemake, 1992)
+    if rng is None:
+        rng = np.random.default_rng()
+    u1, u2, u3 = rng.uniform(size=(3, num_samples))
+    q = np.empty((num_samples, 4))
+    q[:, 0] = np.sqrt(u1)*np.cos(2*np.pi*u3)
+    q[:, 1] = np.sqrt(1-u1)*np.sin(2*np.pi*u2)
+    q[:, 2] = np.sqrt(1-u1)*np.cos(2*np.pi*u2)
+    q[:, 3] = np.sqrt(u1)*np.sin(2*np.pi*u3)
+    return q
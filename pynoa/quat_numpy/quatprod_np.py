@@ -0,0 +1,17 @@
+import numpy as np
+def quatprod_np(q, r):
+    # Batched product of 2 quaternions, numpy counterpart of quatprod_sym
+    # Input args:
+    # q, r = quaternions (N x 4), a single quaternion (4) is broadcast to all rows
+    #
+    # Output args:
+    # n = quaternion products (N x 4)
+    q = np.atleast_2d(np.asarray(q, dtype=float))
+    r = np.atleast_2d(np.asarray(r, dtype=float))
+    q0, q1, q2, q3 = q[:, 0], q[:, 1], q[:, 2], q[:, 3]
+    r0, r1, r2, r3 = r[:, 0], r[:, 1], r[:, 2], r[:, 3]
+    n0 = r0*q0 - r1*q1 - r2*q2 - r3*q3
+    n1 = r0*q1 + r1*q0 - r2*q3 + r3*q2
+    n2 = r0*q2 + r1*q3 + r2*q0 - r3*q1
+    n3 = r0*q3 - r1*q2 + r2*q1 + r3*q0
+    return np.stack([n0, n1, n2, n3], axis=1)
@@ -0,0 +1,13 @@
+import numpy as np
+def quatsub_np(q_sym_var, quats_num):
+    # Bulk substitution dictionary of symbolic quaternion variables, numpy counterpart of quatsub_sym.
+    # The dictionary can be passed as points_dict to NOA.obsv_map, which evaluates the compiled observability matrix at every quaternion.
+    # Input args:
+    # q_sym_var = symbolic quaternion in sympy vector
+    # quats_num = numeric quaternions (N x 4), each row [qw, qx, qy, qz]
+    quats_num = np.atleast_2d(np.asarray(quats_num, dtype=float))
+    q_dict_num = {q_sym_var[0]: quats_num[:, 0],
+                  q_sym_var[1]: quats_num[:, 1],
+                  q_sym_var[2]: quats_num[:, 2],
+                  q_sym_var[3]: quats_num[:, 3]}
+    return q_dict_num
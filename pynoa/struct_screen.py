@@ -0,0 +1,104 @@
+def struct_dependency(expr, x_set):
+    # Set of state variables an expression depends on
+    return frozenset(expr.free_symbols & x_set)
+
+def struct_lie_derivative(pattern, f_support):
+    # Dependency pattern of the Lie derivative L_f g from the dependency pattern of g.
+    # L_f g = sum_i dg/dx_i f_i, where only the states x_i in the pattern of g with a nonzero f_i contribute.
+    # f_support = {state index: dependency pattern of f_i} of the nonzero entries of f
+    idx_contrib = [idx_x for idx_x in pattern if idx_x in f_support]
+    if len(idx_contrib) == 0:
+        return frozenset()                      # structurally zero Lie derivative
+    return pattern.union(*(f_support[idx_x] for idx_x in idx_contrib))
+
+def struct_rank(pattern_counts, sys_order):
+    # Structural rank of the rows {pattern: number of rows} by maximum bipartite matching of rows to state columns.
+    # A pattern can match at most len(pattern) columns, so its rows are capped at len(pattern).
+    rows = [pattern for pattern, count in pattern_counts.items() for _ in range(min(count, len(pattern)))]
+    col_match = [None]*sys_order
+
+    def augment(idx_row, visited):
+        for idx_x in rows[idx_row]:
+            if idx_x not in visited:
+                visited.add(idx_x)
+                if col_match[idx_x] == None or augment(col_match[idx_x], visited):
+                    col_match[idx_x] = idx_row
+                    return True
+        return False
+
+    return sum(augment(idx_row, set()) for idx_row in range(len(rows)))
+
+def struct_screen(x, f, h):
+    # Structural (sparsity pattern) observability screen from the state dependencies of f & h.
+    # The dependency patterns are propagated through the Lie derivative recursion order by order until they repeat,
+    # so the structural rank is an upper bound of the rank of the observability matrix of any order.
+    # Rows with the same pattern are counted up to sys_order, which keeps the number of distinct orders finite.
+    #
+    # Output args:
+    # rank_bound         = structural rank, an upper bound of the rank of the observability matrix
+    # LD_order_min       = minimal Lie derivative order that reaches rank_bound
+    # unobservable_idx   = indices of the states that appear in no Lie derivative, certainly unobservable
+    # rank_bound_order   = structural rank of the observability matrix up to each order [order 0, order 1, ...]
+    x_list = list(x)
+    x_idx = {state: idx_x for idx_x, state in enumerate(x_list)}
+    x_set = set(x_list)
+    sys_order = len(x_list)
+
+    def pattern_idx(expr):
+        return frozenset(x_idx[state] for state in struct_dependency(expr, x_set))
+
+    f_supports = []
+    for f_i in f:
+        f_support = {idx_x: pattern_idx(f_i[idx_x]) for idx_x in range(sys_order) if f_i[idx_x] != 0}
+        if f_support:                           # zero vector fields have structurally zero Lie derivatives
+            f_supports.append(f_support)
+
+    # number of rows of each pattern in the current order, capped at sys_order
+    order_counts = {}
+    for h_j in h:
+        pattern = pattern_idx(h_j)
+        if pattern:
+            order_counts[pattern] = min(order_counts.get(pattern, 0) + 1, sys_order)
+
+    def next_order(order_counts):
+        next_order_counts = {}
+        for pattern, count in order_counts.items():
+            for f_support in f_supports:
+                next_pattern = struct_lie_derivative(pattern, f_support)
+                if next_pattern:
+                    next_order_counts[next_pattern] = min(next_order_counts.get(next_pattern, 0) + count, sys_order)
+        return next_order_counts
+
+    def accumulate(all_counts, order_counts):
+        for pattern, count in order_counts.items():
+            all_counts[pattern] = min(all_counts.get(pattern, 0) + count, sys_order)
+
+    # the patterns of each order only depend on the previous order, so they become periodic after a finite number of orders
+    order_counts_list = [order_counts]
+    while order_counts_list.count(order_counts_list[-1]) == 1:
+        order_counts_list.append(next_order(order_counts_list[-1]))
+    idx_cycle = order_counts_list.index(order_counts_list[-1])
+
+    # patterns of the periodic orders appear in infinitely many Lie derivatives
+    limit_counts = {}
+    for order_counts in order_counts_list:
+        accumulate(limit_counts, order_counts)
+    for order_counts in order_counts_list[idx_cycle:]:
+        for pattern in order_counts:
+            limit_counts[pattern] = sys_order
+    rank_bound = struct_rank(limit_counts, sys_order)
+
+    # structural rank of each order until rank_bound is reached
+    all_counts = {}
+    accumulate(all_counts, order_counts_list[0])
+    rank_bound_order = [struct_rank(all_counts, sys_order)]
+    order_counts = order_counts_list[0]
+    while rank_bound_order[-1] < rank_bound:
+        order_counts = next_order(order_counts)
+        accumulate(all_counts, order_counts)
+        rank_bound_order.append(struct_rank(all_counts, sys_order))
+
+    LD_order_min = rank_bound_order.index(rank_bound)
+    observable_candidates = set().union(*limit_counts) if limit_counts else set()
+    unobservable_idx = [idx_x for idx_x in range(sys_order) if idx_x not in observable_candidates]
+    return rank_bound, LD_order_min, unobservable_idx, rank_bound_order
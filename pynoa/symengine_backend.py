@@ -0,0 +1,26 @@
+import sympy as sp
+from .expr_manage import expr_manage
+
+try:
+    import symengine as se
+except ImportError:
+    se = None
+
+def to_symengine(mat):
+    # Sympy matrix converted to a SymEngine matrix
+    if se == None:
+        raise ImportError("symengine is required for backend_opt = \"symengine\"")
+    return se.Matrix(mat)
+
+def to_sympy(mat_se):
+    # SymEngine matrix converted back to a sympy matrix
+    return sp.Matrix(mat_se._sympy_())
+
+def lie_derivative_symengine(dLfh_dx_prev_se, f_i_se, x_se, simp_opt="none", size_budget=0):
+    # Lie derivative & its gradient wrt x computed by SymEngine.
+    # The inputs & outputs are SymEngine matrices, so a chain of Lie derivatives stays in SymEngine
+    # and the caller only converts the results it stores as sympy.
+    Lfh_se = dLfh_dx_prev_se * f_i_se
+    if simp_opt != "none":
+        Lfh_se = se.Matrix(expr_manage(to_sympy(Lfh_se), simp_opt, size_budget))  # expression management policies are sympy functions
+    return Lfh_se, Lfh_se.jacobian(x_se)
@@ -19,8 +19,11 @@ setup(
         "datetime",
         "IPython",
         "sympy",
-        "dill",
+        "numpy",
     ],
+    extras_require={
+        "symengine": ["symengine"],
+    },
     include_package_data=True,
     classifiers=[
         "Development Status :: 4 - Beta",